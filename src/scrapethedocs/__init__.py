@@ -8,14 +8,55 @@ This module supports the following functions:
                             from PyPI
     get_doc_reference_url   Attempt to retrieve the links to a library's difference guides
                             from package name or homepage link
+    get_doc_page_urls       Retrieve the links to every page of the documentation from the
+                            MkDocs search index or sitemap.xml, falling back to the guides
     get_section_titles      Retrieve the titles of all sections of the documentation,
                             including nested sections
     extract_section         Retrieve all text content of a specific section
+    extract_page            Retrieve the cleaned text of one page, optionally memoized in an ExtractionCache
+    extract_page_sections   Retrieve the heading tree of a page, with the text under every heading
     extract_docs            Retrieve all text content of the documentation
+    extract_docs_from_search_index
+                            Retrieve all text content of an MkDocs site from its search index
+                            without fetching any page
+    extract_docs_prioritized
+                            Retrieve the most important sections of the documentation
+                            within a time or page budget
+    run_worker              Process package and page jobs from a work queue shared with
+                            other processes or hosts
+    shutdown                Close the shared sessions and stop the background event loop
 """
 
-from scrapethedocs._link_extraction import extract_links_by_class, _get
-from scrapethedocs._text_extraction import get_all_titles, get_page_text, clean_page_text
+import os
+import socket
+import threading
+import time
+
+from scrapethedocs._link_extraction import (
+    extract_links_by_class,
+    extract_links_from_sitemap,
+    extract_mkdocs_search_index,
+    _get,
+    _get_encoding,
+    _is_html_link,
+    HTML_CONTENT_TYPES,
+    MAX_BODY_SIZE,
+)
+from scrapethedocs._extraction_cache import ExtractionCache, extractor_version
+from scrapethedocs._boilerplate import BOILERPLATE_THRESHOLD, BoilerplateCounter, strip_lines
+from scrapethedocs._helpers import shutdown
+from scrapethedocs._scheduling import ScheduledDocs, fetch_by_priority, rank_links
+from scrapethedocs._section_store import SectionStore, peak_rss
+from scrapethedocs._work_queue import LEASE_SECONDS, PACKAGE_JOB, PAGE_JOB, Job, SQLiteWorkQueue, WorkQueue
+from scrapethedocs._text_extraction import (
+    Section,
+    get_all_titles,
+    get_page_sections,
+    get_page_text,
+    get_page_title_and_text,
+    clean_page_text,
+)
+from scrapethedocs._theme_detection import _site_key
 
 
 def get_doc_home_url(package_name: str) -> str | None:
@@ -72,6 +113,30 @@ def get_doc_reference_url(package_url: str) -> list[str]:
     return links
 
 
+def get_doc_page_urls(package_url: str) -> list[str]:
+    """
+    Get links to every page of the package's documentation.
+
+    The MkDocs search index and sitemap.xml list every page in one or two requests;
+    sites without either fall back to the guides linked from the home page.
+
+    Args:
+        package_url: the link to the home page of the package's documentation
+
+    Returns:
+        A list of links to the pages of the documentation.
+    """
+    search_pages = extract_mkdocs_search_index(package_url)
+    if search_pages:
+        return list(dict.fromkeys(link for _, link, _ in search_pages))
+
+    sitemap_links = extract_links_from_sitemap(package_url)
+    if sitemap_links:
+        return sitemap_links
+
+    return get_doc_reference_url(package_url)
+
+
 def get_section_titles(package_url: str) -> list[tuple[str, str]]:
     """
     Get the section titles and URLs from a documentation page
@@ -90,12 +155,17 @@ def get_section_titles(package_url: str) -> list[tuple[str, str]]:
     return get_all_titles(links)
 
 
-def extract_page(link: str) -> str | None:
+def extract_page(link: str, max_size: int = MAX_BODY_SIZE, cache: ExtractionCache | None = None) -> str | None:
     """
     Get the relevant documentation from a given page
 
+    With a cache, a page whose body was extracted before by the same version of
+    the extractor is returned without being parsed again.
+
     Args:
         link:               the link to the home page of the package's documentation
+        max_size:           the maximum body size in bytes, larger pages are skipped
+        cache:              the cache of previously extracted pages, None to always parse the page
 
     Returns:
         The text of the specified section
@@ -104,32 +174,313 @@ def extract_page(link: str) -> str | None:
     Raises:
         ValueError: A 4xx error while getting the links
     """
-    response = _get(link)
+    page = _fetch_page(link, max_size)
+    if page is None:
+        return None
+
+    body, encoding = page
+    # The theme detected for a site is reused for all its pages, so the site is part of the key
+    options = {"encoding": encoding, "site": _site_key(link)}
+    if cache is not None:
+        cached_text = cache.get(body, options)
+        if cached_text is not None:
+            return cached_text
+
+    page_text = clean_page_text(get_page_text(body, link, encoding))
+    if cache is not None:
+        cache.put(body, options, page_text)
+    return page_text
+
+
+def _fetch_page(link: str, max_size: int = MAX_BODY_SIZE) -> tuple[bytes, str] | None:
+    """
+    Download an HTML page
+
+    Args:
+        link:               the link to the page
+        max_size:           the maximum body size in bytes, larger pages are skipped
+
+    Returns:
+        The raw body of the page and its encoding
+        None if the link is not an HTML page or it fails to get it
+    """
+    if not _is_html_link(link):
+        return None
+
+    response = _get(link, HTML_CONTENT_TYPES, max_size)
     if response is None:
         return None
 
-    page_text = get_page_text(response.text)
-    return clean_page_text(page_text)
+    return response.content, _get_encoding(response.headers.get("Content-Type"), response.content)
 
 
-def extract_docs(package_url: str) -> dict[str, str]:
+def _extract_page_text(link: str, max_size: int = MAX_BODY_SIZE) -> str | None:
+    """
+    Get the relevant documentation from a given page before it is cleaned
+
+    Args:
+        link:               the link to the page
+        max_size:           the maximum body size in bytes, larger pages are skipped
+
+    Returns:
+        The text of the page, one line per text element
+        None if it fails to get the text
+    """
+    page = _fetch_page(link, max_size)
+    if page is None:
+        return None
+
+    body, encoding = page
+    return get_page_text(body, link, encoding)
+
+
+def extract_page_sections(link: str, max_size: int = MAX_BODY_SIZE) -> Section | None:
+    """
+    Get the heading tree of a given page, with the cleaned text under every heading
+
+    Use Section.find with the fragment of a link to get one sub-section of a large page.
+
+    Args:
+        link:               the link to the page
+        max_size:           the maximum body size in bytes, larger pages are skipped
+
+    Returns:
+        The root section of the page
+        None if it fails to get the page
+    """
+    page = _fetch_page(link, max_size)
+    if page is None:
+        return None
+
+    body, encoding = page
+    root = get_page_sections(body, link, encoding)
+    for section in root.walk():
+        section.text = clean_page_text(section.text)
+    return root
+
+
+def extract_docs(
+    package_url: str,
+    memory_budget: int | None = None,
+    rss_budget: int | None = None,
+    boilerplate_threshold: float | None = None,
+    cache: ExtractionCache | None = None,
+) -> dict[str, str] | SectionStore:
     """
     Get the text of a given section if it exists
 
+    Passing either budget switches to the bounded-memory mode: the sections are
+    collected in a SectionStore that moves their text to a temporary file once
+    the budget is crossed, and the peak memory of the process is printed at the end.
+
+    Passing a boilerplate threshold removes the lines repeated across the site,
+    such as navigation, "Previous/Next" footers, version banners and copyright lines,
+    in a final sweep over the sections before they are cleaned.
+
     Args:
-        package_url:    the link to the home page of the package's documentation
+        package_url:            the link to the home page of the package's documentation
+        memory_budget:          the approximate number of bytes of section text to keep in memory
+        rss_budget:             the process RSS in bytes above which section text is spilled to disk
+        boilerplate_threshold:  the fraction of pages a line has to appear on to be removed,
+                                e.g. BOILERPLATE_THRESHOLD. None keeps every line.
+        cache:                  the cache of previously extracted pages, used unless boilerplate is removed,
+                                since the removed lines depend on every page of the site
 
     Returns:
         A dictionary containing the section titles as keys,
         and their text as the corresponsing value if any sections are found.
         None if no sections are found.
+        A SectionStore with the same contents in the bounded-memory mode; close it to delete the temporary file.
 
     Raises:
         ValueError: A 4xx error while getting the links
     """
     section_titles = get_section_titles(package_url)
-    output = {}
-    for title, link in section_titles:
-        output[title] = extract_page(link)
+    bounded = memory_budget is not None or rss_budget is not None
+    output = SectionStore(memory_budget, rss_budget) if bounded else {}
+    if boilerplate_threshold is None:
+        for title, link in section_titles:
+            output[title] = extract_page(link, cache=cache)
+    else:
+        # The raw texts go to a store of their own, so only the cleaned text is written to the output
+        raw_texts = SectionStore(memory_budget, rss_budget) if bounded else {}
+        counter = BoilerplateCounter()
+        for title, link in section_titles:
+            page_text = _extract_page_text(link)
+            if page_text is not None:
+                counter.add(page_text)
+            raw_texts[title] = page_text
+
+        boilerplate = counter.boilerplate(boilerplate_threshold)
+        for title, page_text in raw_texts.items():
+            output[title] = clean_page_text(strip_lines(page_text, boilerplate)) if page_text is not None else None
+        if isinstance(raw_texts, SectionStore):
+            raw_texts.close()
+
+    if isinstance(output, SectionStore):
+        peak = peak_rss()
+        peak_text = f"{peak / 1e6:.1f} MB" if peak is not None else "unknown"
+        print(f"Peak memory: {peak_text}, {output.spilled_count} of {len(output)} sections spilled to disk")
 
     return output
+
+
+def _extract_titled_page(link: str) -> tuple[str, str] | None:
+    """
+    Get the title and the relevant documentation from a given page with a single request
+
+    Args:
+        link:               the link to the page
+
+    Returns:
+        The title and the text of the page
+        None if it fails to get the text
+    """
+    page = _fetch_page(link)
+    if page is None:
+        return None
+
+    body, encoding = page
+    title, page_text = get_page_title_and_text(body, link, encoding)
+    return title or link, clean_page_text(page_text)
+
+
+def extract_docs_from_search_index(package_url: str) -> dict[str, str] | None:
+    """
+    Get the text of every page of an MkDocs site from its search index
+
+    The index already holds the text of every page, so no page is fetched.
+
+    Args:
+        package_url:    the link to the home page of the package's documentation
+
+    Returns:
+        A dictionary containing the page titles as keys,
+        and their text as the corresponsing value.
+        None if the site has no MkDocs search index.
+    """
+    search_pages = extract_mkdocs_search_index(package_url)
+    if not search_pages:
+        return None
+
+    output = {}
+    for title, _, text in search_pages:
+        if title not in output:
+            output[title] = clean_page_text(text)
+    return output
+
+
+def extract_docs_prioritized(
+    package_url: str,
+    time_budget: float | None = None,
+    page_budget: int | None = None,
+    jobs: int = 8,
+    sizes: dict[str, int] | None = None,
+) -> ScheduledDocs:
+    """
+    Get the text of the most important sections within a time or page budget
+
+    API reference and user guide pages are fetched first, then shallower
+    pages, and changelogs and indices last. Pages at the same depth are ordered
+    by size only when their sizes are given. Every page is requested once.
+
+    Args:
+        package_url:    the link to the home page of the package's documentation
+        time_budget:    the number of seconds to spend, None for no limit
+        page_budget:    the maximum number of pages to fetch, None for no limit
+        jobs:           the number of pages fetched at once
+        sizes:          the known sizes of pages in bytes, e.g. from a previous run,
+                        to fetch smaller pages first. None ranks without sizes.
+
+    Returns:
+        The sections completed within the budget in priority order,
+        and the links that were skipped or failed.
+    """
+    started = time.monotonic()
+    links = rank_links(get_doc_reference_url(package_url), sizes)
+    remaining = None if time_budget is None else max(time_budget - (time.monotonic() - started), 0)
+    result = fetch_by_priority(links, _extract_titled_page, remaining, page_budget, jobs)
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def _process_job(queue: WorkQueue, job: Job) -> dict | None:
+    """
+    Do the work of one job, adding the page jobs of a package to the queue
+
+    Args:
+        queue:      the queue the job was leased from
+        job:        the job to process
+
+    Returns:
+        The result of the job to store in the queue
+
+    Raises:
+        ValueError: the job cannot be processed
+    """
+    if job.kind == PACKAGE_JOB:
+        package = job.payload["package"]
+        doc_url = job.payload.get("url") or get_doc_home_url(package)
+        if doc_url is None:
+            raise ValueError(f"No documentation URL found for {package}")
+        links = get_doc_reference_url(doc_url)
+        for link in links:
+            queue.put(PAGE_JOB, {"package": package, "link": link})
+        return {"url": doc_url, "pages": len(links)}
+
+    if job.kind == PAGE_JOB:
+        page = _extract_titled_page(job.payload["link"])
+        if page is None:
+            return None
+        title, text = page
+        return {"title": title, "text": text}
+
+    raise ValueError(f"Unknown job kind {job.kind}")
+
+
+def run_worker(
+    queue: WorkQueue,
+    worker: str | None = None,
+    lease_seconds: float = LEASE_SECONDS,
+    poll_interval: float = 1.0,
+    idle_timeout: float | None = None,
+) -> int:
+    """
+    Process package and page jobs from a shared queue until it is drained
+
+    A package job looks up the documentation of a package and adds one page job
+    per page; a page job runs the fetch, get_page_text and clean_page_text pipeline
+    on one page. Any number of workers in any number of processes can share the queue.
+
+    Args:
+        queue:          the queue to take jobs from
+        worker:         a unique identifier of the worker, derived from the host, process and thread if not given
+        lease_seconds:  how long a job stays reserved before another worker may retry it
+        poll_interval:  the number of seconds to wait while other workers hold the remaining jobs
+        idle_timeout:   the number of seconds to wait without a job before giving up, None to wait until drained
+
+    Returns:
+        The number of jobs this worker finished
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    finished = 0
+    idle_since = time.monotonic()
+    while True:
+        job = queue.lease(worker, lease_seconds)
+        if job is None:
+            if queue.is_drained():
+                return finished
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                return finished
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            result = _process_job(queue, job)
+        except Exception as general_exception:  # pylint: disable=broad-exception-caught
+            print(f"Job {job.id} failed on attempt {job.attempts}: {general_exception}")
+            queue.nack(job, worker, f"{type(general_exception).__name__}: {general_exception}")
+        else:
+            if queue.ack(job, worker, result):
+                finished += 1
+        idle_since = time.monotonic()
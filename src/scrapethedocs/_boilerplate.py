@@ -0,0 +1,95 @@
+"""
+Helper functions for cross-page boilerplate detection
+"""
+
+from collections import Counter
+
+from scrapethedocs._text_extraction import SECTION_START_PREFIXES
+
+# The fraction of pages a line has to appear on to count as boilerplate
+BOILERPLATE_THRESHOLD = 0.8
+# Sites with fewer pages do not have enough of them to tell boilerplate from content
+MIN_BOILERPLATE_PAGES = 3
+# Docstring section headings, which repeat on every page of an API reference but give the page its structure
+STRUCTURAL_LINES = {
+    "Parameters",
+    "Other Parameters",
+    "Keyword Arguments",
+    "Returns",
+    "Return type",
+    "Yields",
+    "Raises",
+    "Warns",
+    "Examples",
+    "Example",
+    "Notes",
+    "See also",
+    "See Also",
+    "References",
+    "Attributes",
+    "Methods",
+}
+
+
+def _is_structural(line: str) -> bool:
+    """
+    Check whether a line structures the page, so it must be kept however often it repeats
+    """
+    return line.rstrip(":") in STRUCTURAL_LINES or line.startswith(SECTION_START_PREFIXES)
+
+
+class BoilerplateCounter:
+    """
+    Streaming counter of the number of pages every line appears on.
+
+    Only a hash of each line is kept, so the counter stays small
+    however many pages are added. Docstring section headings and the
+    lines clean_page_text splits on are never counted.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.counts: Counter[int] = Counter()
+
+    def add(self, text: str) -> None:
+        """
+        Count the distinct lines of one page
+
+        Args:
+            text:       the text of the page
+        """
+        self.pages += 1
+        lines = {line.strip() for line in text.split("\n")}
+        self.counts.update(hash(line) for line in lines if line and not _is_structural(line))
+
+    def boilerplate(self, threshold: float = BOILERPLATE_THRESHOLD, min_pages: int = MIN_BOILERPLATE_PAGES) -> set[int]:
+        """
+        Get the hashes of the lines that appear on too many pages
+
+        Args:
+            threshold:  the fraction of pages a line has to appear on
+            min_pages:  the minimum number of pages counted before any line is boilerplate
+
+        Returns:
+            The hashes of the boilerplate lines
+        """
+        if self.pages < min_pages:
+            return set()
+        limit = max(threshold * self.pages, min_pages)
+        return {line_hash for line_hash, count in self.counts.items() if count >= limit}
+
+
+def strip_lines(text: str, boilerplate: set[int]) -> str:
+    """
+    Remove the boilerplate lines from a page
+
+    Args:
+        text:           the text of the page
+        boilerplate:    the hashes of the lines to remove
+
+    Returns:
+        The text without the boilerplate lines
+    """
+    if not boilerplate:
+        return text
+    return "\n".join(line for line in text.split("\n") if hash(line.strip()) not in boilerplate)
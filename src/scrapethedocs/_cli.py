@@ -0,0 +1,418 @@
+"""
+Command-line entry point for scraping the documentation of many packages
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TextIO
+
+from scrapethedocs import extract_page, get_doc_home_url, get_section_titles, run_worker
+from scrapethedocs._extraction_cache import ExtractionCache
+from scrapethedocs._work_queue import (
+    LEASE_SECONDS,
+    PACKAGE_JOB,
+    PAGE_JOB,
+    SQLiteWorkQueue,
+    WorkQueue,
+)
+
+REQUIREMENT_NAME_PATTERN = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+PROGRESS_INTERVAL = 1.0
+
+
+@dataclass
+class _Stats:
+    """
+    Counters shared by the workers, read by the progress reporter
+    """
+
+    started: float = field(default_factory=time.monotonic)
+    pages: int = 0
+    bytes: int = 0
+    errors: int = 0
+    packages_done: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add_page(self, text: str | None) -> None:
+        """
+        Count one extracted page, or one error if extraction failed
+        """
+        with self.lock:
+            if text is None:
+                self.errors += 1
+            else:
+                self.pages += 1
+                self.bytes += len(text.encode("utf-8"))
+
+    def add_package(self, failed: bool) -> None:
+        """
+        Count one finished package
+        """
+        with self.lock:
+            self.packages_done += 1
+            if failed:
+                self.errors += 1
+
+    def format(self, packages_total: int) -> str:
+        """
+        Format the current throughput
+        """
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            return (
+                f"{self.packages_done}/{packages_total} packages, {self.pages} pages "
+                f"({self.pages / elapsed:.1f} pages/s), {self.bytes / 1e6:.1f} MB, {self.errors} errors"
+            )
+
+
+@dataclass
+class _PackageResult:
+    """
+    Outcome of scraping one package, used for the final summary
+    """
+
+    package: str
+    status: str
+    sections: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+
+def read_requirements(path: str) -> list[str]:
+    """
+    Read the package names from a requirements file
+
+    Options, comments, URLs and local paths are skipped, and version
+    specifiers, extras and markers are stripped.
+
+    Args:
+        path:       the path to the requirements file
+
+    Returns:
+        The package names in file order, without duplicates
+    """
+    names: list[str] = []
+    with open(path, encoding="utf-8") as requirements:
+        for line in requirements:
+            line = line.split("#", 1)[0].strip()
+            if not line or line.startswith(("-", ".", "/")) or "://" in line:
+                continue
+            match = REQUIREMENT_NAME_PATTERN.match(line)
+            if match and match.group(1) not in names:
+                names.append(match.group(1))
+    return names
+
+
+def scrape_package(package: str, stats: _Stats, cache: ExtractionCache | None = None) -> tuple[dict | None, _PackageResult]:
+    """
+    Run the full pipeline for one package
+
+    Args:
+        package:    the name of the package as it appears on PyPI
+        stats:      the shared counters to update after every page
+        cache:      the cache of previously extracted pages, None to parse every page
+
+    Returns:
+        The record to write, or None if the package failed, and its summary
+    """
+    started = time.monotonic()
+    result = _PackageResult(package, "failed")
+    try:
+        doc_url = get_doc_home_url(package)
+        if doc_url is None:
+            result.error = "no documentation URL on PyPI"
+            return None, result
+
+        sections: dict[str, str | None] = {}
+        for title, link in get_section_titles(doc_url):
+            text = extract_page(link, cache=cache)
+            stats.add_page(text)
+            sections[title] = text
+            result.bytes += len(text.encode("utf-8")) if text else 0
+    except Exception as general_exception:  # pylint: disable=broad-exception-caught
+        result.error = f"{type(general_exception).__name__}: {general_exception}"
+        return None, result
+    finally:
+        result.seconds = time.monotonic() - started
+
+    result.status = "ok"
+    result.sections = len(sections)
+    return {"package": package, "url": doc_url, "sections": sections}, result
+
+
+def _completed_packages(args: argparse.Namespace) -> set[str]:
+    """
+    Find the packages written by a previous run of the same command
+    """
+    if args.output_dir is not None:
+        if not args.output_dir.is_dir():
+            return set()
+        return {path.stem for path in args.output_dir.glob("*.json")}
+
+    if not args.jsonl.is_file():
+        return set()
+    completed = set()
+    with open(args.jsonl, encoding="utf-8") as jsonl:
+        for line in jsonl:
+            try:
+                completed.add(json.loads(line)["package"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # A line cut short by an interruption
+                continue
+    return completed
+
+
+class _Writer:
+    """
+    Write records to an output directory or a JSONL file from several threads
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.lock = threading.Lock()
+        self.output_dir: Path | None = args.output_dir
+        self.jsonl: TextIO | None = None
+        if self.output_dir is not None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            # Start on a fresh line after a record cut short by an interruption
+            needs_newline = False
+            if args.jsonl.is_file() and args.jsonl.stat().st_size > 0:
+                with open(args.jsonl, "rb") as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    needs_newline = existing.read(1) != b"\n"
+            self.jsonl = open(args.jsonl, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+            if needs_newline:
+                self.jsonl.write("\n")
+
+    def write(self, record: dict) -> None:
+        """
+        Write one record so that an interruption never leaves it half written
+        """
+        if self.output_dir is not None:
+            path = self.output_dir / f"{record['package']}.json"
+            tmp_path = path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, path)
+            return
+
+        assert self.jsonl is not None
+        with self.lock:
+            self.jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.jsonl.flush()
+
+    def close(self) -> None:
+        """
+        Close the JSONL file if one is open
+        """
+        if self.jsonl is not None:
+            self.jsonl.close()
+
+
+def _report_progress(stats: _Stats, packages_total: int, done: threading.Event) -> None:
+    """
+    Print the throughput to stderr until the run is done
+    """
+    interactive = sys.stderr.isatty()
+    interval = PROGRESS_INTERVAL if interactive else PROGRESS_INTERVAL * 10
+    while not done.wait(interval):
+        if interactive:
+            print(f"\r{stats.format(packages_total)}", end="", file=sys.stderr, flush=True)
+        else:
+            print(stats.format(packages_total), file=sys.stderr, flush=True)
+    if interactive:
+        print(file=sys.stderr)
+
+
+def _print_summary(results: list[_PackageResult], stats: _Stats, packages_total: int) -> None:
+    """
+    Print one line per package and the totals to stderr
+    """
+    width = max((len(result.package) for result in results), default=7)
+    print(f"{'package':<{width}}  {'status':<7}  {'sections':>8}  {'bytes':>12}  {'seconds':>8}", file=sys.stderr)
+    for result in results:
+        line = f"{result.package:<{width}}  {result.status:<7}  {result.sections:>8}  {result.bytes:>12}  {result.seconds:>8.1f}"
+        if result.error:
+            line += f"  {result.error}"
+        print(line, file=sys.stderr)
+    print(stats.format(packages_total), file=sys.stderr)
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    """
+    Parse the command-line arguments
+    """
+    parser = argparse.ArgumentParser(prog="scrapethedocs", description="Scrape the documentation of Python packages.")
+    parser.add_argument("packages", nargs="*", help="names of the packages as they appear on PyPI")
+    parser.add_argument("-r", "--requirements", action="append", default=[], help="read package names from a requirements file")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="number of packages scraped concurrently (default: 4)")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("-o", "--output-dir", type=Path, help="write one <package>.json file per package to this directory")
+    output.add_argument("--jsonl", type=Path, help="append one JSON line per package to this file")
+    parser.add_argument("--resume", action="store_true", help="skip the packages already written by a previous run")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the live throughput")
+    parser.add_argument("--cache", type=Path, help="reuse the text of unchanged pages stored in this SQLite file by previous runs")
+
+    args = parser.parse_args(argv)
+    for path in args.requirements:
+        args.packages.extend(name for name in read_requirements(path) if name not in args.packages)
+    if not args.packages:
+        parser.error("no packages given")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Scrape the documentation of every package given on the command line
+
+    Args:
+        argv:       the command-line arguments, sys.argv[1:] if not given
+
+    Returns:
+        0 if every package was scraped, 1 if any failed, 130 if interrupted
+    """
+    args = _parse_args(argv)
+
+    results: dict[str, _PackageResult] = {}
+    packages = args.packages
+    if args.resume:
+        completed = _completed_packages(args)
+        for package in packages:
+            if package in completed:
+                results[package] = _PackageResult(package, "skipped")
+        packages = [package for package in packages if package not in completed]
+
+    stats = _Stats()
+    done = threading.Event()
+    reporter = None
+    if not args.quiet:
+        reporter = threading.Thread(target=_report_progress, args=(stats, len(packages), done), daemon=True)
+        reporter.start()
+
+    writer = _Writer(args)
+    cache = ExtractionCache(args.cache) if args.cache is not None else None
+    executor = ThreadPoolExecutor(max_workers=args.jobs)
+    interrupted = False
+    try:
+        futures = {executor.submit(scrape_package, package, stats, cache): package for package in packages}
+        for future in as_completed(futures):
+            record, result = future.result()
+            if record is not None:
+                writer.write(record)
+            stats.add_package(record is None)
+            results[result.package] = result
+    except KeyboardInterrupt:
+        interrupted = True
+        executor.shutdown(wait=False, cancel_futures=True)
+    finally:
+        executor.shutdown(wait=not interrupted)
+        writer.close()
+        done.set()
+        if reporter is not None:
+            reporter.join()
+        if cache is not None:
+            cache_stats = cache.stats()
+            print(
+                f"Extraction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%})",
+                file=sys.stderr,
+            )
+            cache.close()
+
+    summary = [results[package] for package in args.packages if package in results]
+    _print_summary(summary, stats, len(packages))
+    if interrupted:
+        return 130
+    return 1 if any(result.status == "failed" for result in summary) else 0
+
+
+def export_queue_results(queue: WorkQueue, path: Path) -> int:
+    """
+    Write the finished packages of a work queue as JSON lines, like --jsonl
+
+    Args:
+        queue:      the drained queue
+        path:       the JSONL file to write
+
+    Returns:
+        The number of packages written
+    """
+    records: dict[str, dict] = {}
+    for payload, result in queue.results(PACKAGE_JOB):
+        records[payload["package"]] = {"package": payload["package"], "url": result["url"], "sections": {}}
+    for payload, result in queue.results(PAGE_JOB):
+        record = records.get(payload["package"])
+        if record is not None and result is not None and result["title"] not in record["sections"]:
+            record["sections"][result["title"]] = result["text"]
+
+    with open(path, "w", encoding="utf-8") as jsonl:
+        for record in records.values():
+            jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(records)
+
+
+def worker_main(argv: list[str] | None = None) -> int:
+    """
+    Add packages to a shared work queue and process its jobs
+
+    Start the same command on as many processes or hosts as needed; the
+    package and page jobs are split between them without duplicated work.
+
+    Args:
+        argv:       the command-line arguments, sys.argv[1:] if not given
+
+    Returns:
+        0 if every job was done, 1 if any failed
+    """
+    parser = argparse.ArgumentParser(prog="scrapethedocs-worker", description="Scrape documentation from a shared work queue.")
+    parser.add_argument("queue", type=Path, help="the SQLite file holding the queue, created if missing")
+    parser.add_argument("packages", nargs="*", help="names of packages to add to the queue")
+    parser.add_argument("-r", "--requirements", action="append", default=[], help="add the packages of a requirements file to the queue")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="number of worker threads in this process (default: 4)")
+    parser.add_argument("--enqueue-only", action="store_true", help="add the packages and exit without processing jobs")
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help="seconds before a job held by a dead worker is retried")
+    parser.add_argument("--idle-timeout", type=float, default=None, help="seconds to wait for jobs held by other workers")
+    parser.add_argument("--export", type=Path, help="write the finished packages to this JSONL file once the queue is drained")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    packages = list(args.packages)
+    for path in args.requirements:
+        packages.extend(name for name in read_requirements(path) if name not in packages)
+
+    queue = SQLiteWorkQueue(str(args.queue))
+    added = sum(queue.put(PACKAGE_JOB, {"package": package}) for package in packages)
+    if packages:
+        print(f"Added {added} of {len(packages)} packages to {args.queue}", file=sys.stderr)
+
+    if not args.enqueue_only:
+
+        def work() -> int:
+            # Every thread needs its own connection to the queue
+            thread_queue = SQLiteWorkQueue(str(args.queue))
+            try:
+                return run_worker(thread_queue, lease_seconds=args.lease, idle_timeout=args.idle_timeout)
+            finally:
+                thread_queue.close()
+
+        with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            finished = sum(executor.map(lambda _: work(), range(args.jobs)))
+        print(f"Finished {finished} jobs", file=sys.stderr)
+
+    counts = queue.counts()
+    print(", ".join(f"{count} {status}" for status, count in counts.items()), file=sys.stderr)
+    if args.export is not None and queue.is_drained():
+        exported = export_queue_results(queue, args.export)
+        print(f"Wrote {exported} packages to {args.export}", file=sys.stderr)
+    queue.close()
+    return 1 if counts["failed"] else 0
@@ -0,0 +1,223 @@
+"""
+Persistent memoization of extracted page text
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import cache
+from pathlib import Path
+
+from scrapethedocs import _text_extraction, _theme_detection
+
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# The source files whose changes change the extracted text
+EXTRACTOR_MODULES = [_text_extraction, _theme_detection]
+
+
+def default_cache_path() -> Path:
+    """
+    Get the default location of the extraction cache
+
+    Returns:
+        The path under $XDG_CACHE_HOME, or ~/.cache if it is not set
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "scrapethedocs" / "extraction.sqlite"
+
+
+@cache
+def _source_fingerprint() -> str:
+    """
+    Hash the source of the extraction code once per process
+    """
+    digest = hashlib.sha256()
+    for module in EXTRACTOR_MODULES:
+        try:
+            digest.update(Path(str(module.__file__)).read_bytes())
+        except OSError:
+            # Without the source, e.g. in a zip, fall back to the module name
+            digest.update(module.__name__.encode())
+    return digest.hexdigest()
+
+
+def extractor_version() -> str:
+    """
+    Fingerprint the extraction code and configuration
+
+    The configuration lists are read on every call, so changing
+    TEXT_ELEMENTS or CONTENT_CLASSES at runtime invalidates the cache too.
+
+    Returns:
+        A hash that changes whenever the extracted text could change
+    """
+    config = [
+        _text_extraction.TEXT_ELEMENTS,
+        _text_extraction.CONTAINER_ELEMENTS,
+        _text_extraction.CONTENT_CLASSES,
+        _theme_detection.THEME_SELECTORS,
+        _theme_detection.GENERATOR_MARKERS,
+    ]
+    digest = hashlib.sha256(_source_fingerprint().encode())
+    digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()[:32]
+
+
+class ExtractionCache:
+    """
+    A persistent cache of cleaned page text keyed by the hash of the page body,
+    the extractor version and the extraction options.
+
+    The least recently used entries are evicted once the stored text exceeds
+    max_bytes. Entries written by another extractor version are deleted when
+    the cache is opened. Safe to share between threads.
+    """
+
+    def __init__(self, path: str | Path | None = None, max_bytes: int = MAX_CACHE_BYTES):
+        """
+        Args:
+            path:       the path to the SQLite file, default_cache_path() if not given
+            max_bytes:  the maximum size of the stored text in bytes
+        """
+        path = Path(path) if path is not None else default_cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        # A single row with the running count and size of the entries, so writes never scan the table
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+        )
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute("DELETE FROM entries WHERE version != ?", (extractor_version(),))
+            self.connection.execute("INSERT OR REPLACE INTO totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM entries")
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _key(body: bytes, options: dict, version: str) -> str:
+        digest = hashlib.sha256(body)
+        digest.update(version.encode())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, body: bytes, options: dict) -> str | None:
+        """
+        Get the text extracted from a body before
+
+        Args:
+            body:       the raw body of the page
+            options:    the JSON-serializable options the text was extracted with
+
+        Returns:
+            The cleaned text, None if the body was not extracted with this version and these options
+        """
+        key = self._key(body, options, extractor_version())
+        with self.lock:
+            row = self.connection.execute("SELECT text FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.connection.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, body: bytes, options: dict, text: str) -> None:
+        """
+        Store the text extracted from a body, evicting the least recently used entries if needed
+
+        Args:
+            body:       the raw body of the page
+            options:    the JSON-serializable options the text was extracted with
+            text:       the cleaned text
+        """
+        version = extractor_version()
+        key = self._key(body, options, version)
+        size = len(text.encode("utf-8"))
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._put_locked(key, version, text, size)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def _put_locked(self, key: str, version: str, text: str, size: int) -> None:
+        """
+        Store an entry and keep the totals up to date, inside the transaction of put
+        """
+        old = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries (key, version, text, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, version, text, size, time.time()),
+        )
+        added, delta = (0, size - old[0]) if old is not None else (1, size)
+        self.connection.execute("UPDATE totals SET entries = entries + ?, bytes = bytes + ? WHERE id = 0", (added, delta))
+
+        total = self.connection.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for old_key, old_size in self.connection.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((old_key,))
+            total -= old_size
+        self.connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self.connection.execute("UPDATE totals SET entries = entries - ?, bytes = ? WHERE id = 0", (len(evicted), total))
+
+    def stats(self) -> dict[str, float]:
+        """
+        Get the hit rate and size of the cache
+
+        Returns:
+            The hits and misses of this instance, their hit rate, and the number and size of the stored entries
+        """
+        with self.lock:
+            entries, size = self.connection.execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": size,
+            }
+
+    def clear(self) -> None:
+        """
+        Delete every entry
+        """
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("DELETE FROM entries")
+            self.connection.execute("UPDATE totals SET entries = 0, bytes = 0 WHERE id = 0")
+            self.connection.execute("COMMIT")
+
+    def close(self) -> None:
+        """
+        Close the connection to the SQLite file
+        """
+        self.connection.close()
@@ -3,17 +3,96 @@ Private helper functions for the scrapethedocs module
 """
 
 import asyncio
+import atexit
+import threading
 from functools import wraps
 from typing import Awaitable, Callable, ParamSpec, TypeVar
 
 P = ParamSpec("P")
 T = TypeVar("T")
 
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_lock = threading.Lock()
+_shutdown_hooks: list[Callable[[], Awaitable[None]]] = []
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the background event loop, starting it on first use
+
+    Returns:
+        loop:   an event loop running forever in a dedicated daemon thread
+    """
+    global _loop, _loop_thread  # pylint: disable=global-statement
+
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="scrapethedocs-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def _add_shutdown_hook(hook: Callable[[], Awaitable[None]]) -> None:
+    """
+    Register a coroutine function to run on the background loop before it stops
+
+    Args:
+        hook:   an async function without arguments, e.g. closing a shared session
+    """
+    with _loop_lock:
+        if hook not in _shutdown_hooks:
+            _shutdown_hooks.append(hook)
+
+
+async def _run_shutdown_hooks() -> None:
+    """
+    Run and clear the registered shutdown hooks
+    """
+    with _loop_lock:
+        hooks = list(_shutdown_hooks)
+        _shutdown_hooks.clear()
+    for hook in hooks:
+        await hook()
+
+
+def shutdown() -> None:
+    """
+    Close the shared sessions and stop the background event loop.
+
+    Safe to call more than once; the loop is started again by the next synchronous call.
+    """
+    global _loop, _loop_thread  # pylint: disable=global-statement
+
+    with _loop_lock:
+        loop, thread = _loop, _loop_thread
+        _loop, _loop_thread = None, None
+
+    if loop is None or loop.is_closed():
+        return
+
+    if threading.current_thread() is thread:
+        raise RuntimeError("Cannot shut down the background event loop from inside it.")
+
+    asyncio.run_coroutine_threadsafe(_run_shutdown_hooks(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join()
+    loop.close()
+
+
+atexit.register(shutdown)
+
 
 def _to_sync(func: Callable[P, Awaitable[T]]) -> Callable[P, T]:  # pragma: no cover
     """
     Wraps an async function to convert it to a synchronous function
 
+    The coroutine runs on a long-lived event loop in a background thread, so the
+    synchronous function can be called from any thread, including one that is
+    already running an event loop (Jupyter, async web servers).
+
     Args:
         func:   an async function
 
@@ -23,11 +102,11 @@ def _to_sync(func: Callable[P, Awaitable[T]]) -> Callable[P, T]:  # pragma: no c
     """
 
     @wraps(func)
-    def run(*args: P.args, **kwargs: P.kwargs):
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            raise RuntimeError(f"Use {func.__name__} when calling inside an asyncio event loop.")
+    def run(*args: P.args, **kwargs: P.kwargs) -> T:
+        loop = _get_loop()
+        if threading.current_thread() is _loop_thread:
+            raise RuntimeError(f"Await {func.__name__}.__wrapped__ when calling inside the scrapethedocs event loop.")
 
-        return loop.run_until_complete(func(*args, **kwargs))
+        return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), loop).result()
 
     return run
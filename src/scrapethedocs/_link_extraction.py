@@ -2,18 +2,151 @@
 Functions to assist with link extraction
 """
 
+from __future__ import annotations
+
+import codecs
+import gzip
+import html
+import io
+import json
+import re
+from typing import TYPE_CHECKING, Iterator
 from urllib.parse import urljoin, urlparse
+from xml.etree import ElementTree
+
+# requests and bs4 are imported by the functions using them, so importing the package stays fast
+if TYPE_CHECKING:
+    import requests
+
+MAX_BODY_SIZE = 20 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+HTML_CONTENT_TYPES = ["text/html", "application/xhtml+xml"]
+DEFAULT_ENCODING = "utf-8"
+# The HTML standard only looks for <meta charset> in the first 1024 bytes
+ENCODING_SNIFF_SIZE = 1024
+HEADER_CHARSET_PATTERN = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+META_CHARSET_PATTERN = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+SITEMAP_CONTENT_TYPES = ["application/xml", "text/xml", "application/gzip", "application/x-gzip", "application/octet-stream"]
+SITEMAP_NAMES = ["sitemap.xml", "sitemap.xml.gz"]
+# A sitemap index pointing at more sitemaps than this is a whole domain, not one documentation site
+MAX_SITEMAPS = 50
+GZIP_MAGIC = b"\x1f\x8b"
+MKDOCS_SEARCH_INDEX = "search/search_index.json"
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r" ([.,;:!?)])")
+# The extensions of a last path segment naming a page rather than a directory, e.g. not /3.12 or /1.26
+PAGE_EXTENSIONS = (".html", ".htm", ".php")
+SKIPPED_EXTENSIONS = [
+    ".txt",
+    ".pdf",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".svg",
+    ".ico",
+    ".webp",
+    ".css",
+    ".js",
+    ".json",
+    ".xml",
+    ".zip",
+    ".gz",
+    ".tar",
+    ".whl",
+    ".ipynb",
+    ".py",
+    ".woff",
+    ".woff2",
+    ".mp4",
+]
+
+
+def _is_html_link(url: str) -> bool:
+    """
+    Check whether a link looks like an HTML page from its URL alone
+
+    Args:
+        url:            the link to check
+
+    Returns:
+        False if the link points at raw sources or a known non-HTML file, True otherwise
+    """
+    path = urlparse(url).path.lower()
+    if "/_sources/" in path:
+        return False
+    return not path.endswith(tuple(SKIPPED_EXTENSIONS))
+
+
+def _get_encoding(content_type: str | None, body: bytes) -> str:
+    """
+    Get the encoding of an HTML body without running charset detection over it
+
+    The charset declared in the Content-Type header takes priority, followed by
+    a <meta charset> at the start of the document. Anything else is treated as UTF-8.
+
+    Args:
+        content_type:   the value of the Content-Type header if sent
+        body:           the raw body of the response
+
+    Returns:
+        The name of the encoding
+    """
+    candidates = []
+    if content_type:
+        header_match = HEADER_CHARSET_PATTERN.search(content_type)
+        if header_match:
+            candidates.append(header_match.group(1))
+
+    meta_match = META_CHARSET_PATTERN.search(body[:ENCODING_SNIFF_SIZE])
+    if meta_match:
+        candidates.append(meta_match.group(1).decode("ascii"))
+
+    for candidate in candidates:
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+    return DEFAULT_ENCODING
+
 
-import bs4
-import requests
+def _is_acceptable(content_type: str | None, content_length: int | None, content_types: list[str] | None, max_size: int) -> bool:
+    """
+    Check the response headers before reading the body
+
+    Args:
+        content_type:   the value of the Content-Type header if sent
+        content_length: the value of the Content-Length header if sent
+        content_types:  the accepted media types, or None to accept any
+        max_size:       the maximum body size in bytes
+
+    Returns:
+        True if the body should be read, False otherwise
+    """
+    if content_types is not None and content_type:
+        media_type = content_type.split(";")[0].strip().lower()
+        if media_type not in content_types:
+            print(f"Skipping a response of type {media_type}")
+            return False
 
+    if content_length is not None and content_length > max_size:
+        print(f"Skipping a response of {content_length} bytes")
+        return False
 
-def _get(url: str) -> requests.Response | None:
+    return True
+
+
+def _get(url: str, content_types: list[str] | None = None, max_size: int = MAX_BODY_SIZE) -> requests.Response | None:
     """
     Retrieve the HTML content of a webpage and handle exceptions
 
+    The headers are checked before the body is downloaded, and the download
+    is aborted as soon as the body grows past the maximum size.
+
     Args:
         url:            the link to the webpage
+        content_types:  the accepted media types, or None to accept any
+        max_size:       the maximum body size in bytes
 
     Returns:
         response_text:  the contents of the webpage
@@ -23,16 +156,43 @@ def _get(url: str) -> requests.Response | None:
         requests.exception.ConnectionError: a connection error occurred
         requests.exception.TimeoutError:    the connection timed out
     """
+    import requests  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
     try:
-        response: requests.Response = requests.get(url, timeout=10)
+        response: requests.Response = requests.get(url, timeout=10, stream=True)
     except requests.exceptions.RequestException as general_exception:
         print(f"A request error occurred: {general_exception}")
         return None
 
     if response.status_code != 200:
         print(f"The request returned a non-OK status code {response.status_code}")
+        response.close()
+        return None
+
+    content_length = response.headers.get("Content-Length")
+    if not _is_acceptable(
+        response.headers.get("Content-Type"),
+        int(content_length) if content_length and content_length.isdigit() else None,
+        content_types,
+        max_size,
+    ):
+        response.close()
         return None
 
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            body.extend(chunk)
+            if len(body) > max_size:
+                print(f"Aborting the download of {url} after {len(body)} bytes")
+                response.close()
+                return None
+    except requests.exceptions.RequestException as general_exception:
+        print(f"A request error occurred: {general_exception}")
+        return None
+
+    # Let the response serve .text and .json() from the body read above
+    response._content = bytes(body)  # pylint: disable=protected-access
     return response
 
 
@@ -51,18 +211,163 @@ def extract_links_by_class(base_url: str, classes: list[str]) -> list[str]:
     Raises:
         ValueError:     a 4xx error while getting the link.
     """
-    response = _get(base_url)
+    response = _get(base_url, HTML_CONTENT_TYPES)
     if response is None:
         return []
 
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
+    from bs4 import BeautifulSoup  # pylint: disable=import-outside-toplevel
+
+    encoding = _get_encoding(response.headers.get("Content-Type"), response.content)
+    soup = BeautifulSoup(response.content, "html.parser", from_encoding=encoding)
     full_links = [base_url]
     for link_element in soup.find_all("a", class_=" ".join(classes), href=True):
         link: str = link_element["href"]
         # Check if the link is an absolute link
-        if bool(urlparse(link).netloc):
+        if not bool(urlparse(link).netloc):
+            link = urljoin(base_url, link)
+        if _is_html_link(link):
             full_links.append(link)
-        else:
-            full_links.append(urljoin(base_url, link))
 
     return full_links
+
+
+def _site_dir(url: str) -> str:
+    """
+    Get the directory a documentation page belongs to, ending with a slash
+
+    Args:
+        url:            a link to the home page of the documentation
+
+    Returns:
+        The link with any page name removed, e.g. for https://example.com/en/latest/index.html
+        or https://example.com/en/latest, https://example.com/en/latest/.
+        Versioned directories such as https://docs.python.org/3.12 are kept.
+    """
+    parsed = urlparse(url)
+    path = parsed.path or "/"
+    directory, _, last_segment = path.rpartition("/")
+    if last_segment.lower().endswith(PAGE_EXTENSIONS):
+        path = directory + "/"
+    elif last_segment:
+        path += "/"
+    return parsed._replace(path=path, query="", fragment="").geturl()
+
+
+def _iter_sitemap_locs(body: bytes) -> Iterator[tuple[str, str]]:
+    """
+    Stream the <loc> entries of a sitemap or a sitemap index
+
+    Args:
+        body:           the sitemap, gzip-compressed or not
+
+    Returns:
+        Pairs of the kind of entry, "url" or "sitemap", and its location
+    """
+    stream: io.BufferedIOBase = io.BytesIO(body)
+    if body.startswith(GZIP_MAGIC):
+        stream = gzip.GzipFile(fileobj=stream)
+
+    for _, element in ElementTree.iterparse(stream, events=("end",)):
+        tag = element.tag.rsplit("}", 1)[-1]
+        if tag in ("url", "sitemap"):
+            loc = next((child.text for child in element if child.tag.rsplit("}", 1)[-1] == "loc"), None)
+            if loc:
+                yield tag, loc.strip()
+            # Drop the parsed entries so memory stays flat on large sitemaps
+            element.clear()
+
+
+def extract_links_from_sitemap(base_url: str) -> list[str]:
+    """
+    Get a list of documentation pages from the sitemap of the site
+
+    The sitemap is looked for next to the documentation home page, then at the root
+    of the domain. Sitemap indexes are followed one level deep, and only the pages
+    under the directory of the home page are kept.
+
+    Args:
+        base_url:       a link to the home page of the documentation
+
+    Returns:
+        full_links:     the home page followed by every page listed in the sitemap,
+                        empty if no sitemap was found
+    """
+    site_dir = _site_dir(base_url)
+    candidates = [urljoin(site_dir, name) for name in SITEMAP_NAMES]
+    candidates += [urljoin(site_dir, "/" + name) for name in SITEMAP_NAMES if urljoin(site_dir, "/" + name) not in candidates]
+
+    for sitemap_url in candidates:
+        response = _get(sitemap_url, SITEMAP_CONTENT_TYPES)
+        if response is None:
+            continue
+
+        # A dict keeps the sitemap order and checks for duplicates in constant time
+        full_links = {base_url: None}
+        pending_sitemaps: list[str] = []
+        try:
+            for kind, loc in _iter_sitemap_locs(response.content):
+                if kind == "sitemap":
+                    pending_sitemaps.append(loc)
+                elif loc.startswith(site_dir) and _is_html_link(loc):
+                    full_links[loc] = None
+
+            for child_url in pending_sitemaps[:MAX_SITEMAPS]:
+                child_response = _get(child_url, SITEMAP_CONTENT_TYPES)
+                if child_response is None:
+                    continue
+                for kind, loc in _iter_sitemap_locs(child_response.content):
+                    if kind == "url" and loc.startswith(site_dir) and _is_html_link(loc):
+                        full_links[loc] = None
+        except (ElementTree.ParseError, OSError, EOFError) as parse_exception:
+            print(f"Could not parse the sitemap {sitemap_url}: {parse_exception}")
+            continue
+
+        if len(full_links) > 1:
+            return list(full_links)
+
+    return []
+
+
+def extract_mkdocs_search_index(base_url: str) -> list[tuple[str, str, str]]:
+    """
+    Get every page of an MkDocs site with its text from the site's search index
+
+    The index holds one entry per page and one per heading; the headings are
+    folded back into their page in document order.
+
+    Args:
+        base_url:       a link to the home page of the documentation
+
+    Returns:
+        pages:          tuples (title, link, text) in index order, empty if the site has no index
+    """
+    site_dir = _site_dir(base_url)
+    response = _get(urljoin(site_dir, MKDOCS_SEARCH_INDEX), ["application/json"])
+    if response is None:
+        return []
+
+    try:
+        docs = json.loads(response.content).get("docs", [])
+    except (ValueError, AttributeError) as parse_exception:
+        print(f"Could not parse the search index of {site_dir}: {parse_exception}")
+        return []
+
+    pages: dict[str, tuple[str, list[str]]] = {}
+    for doc in docs:
+        if not isinstance(doc, dict) or "location" not in doc:
+            continue
+        location, _, anchor = str(doc["location"]).partition("#")
+        link = urljoin(site_dir, location)
+        title = html.unescape(TAG_PATTERN.sub("", str(doc.get("title", "")))).strip()
+        text = html.unescape(TAG_PATTERN.sub(" ", str(doc.get("text", ""))))
+        text = "\n".join(SPACE_BEFORE_PUNCTUATION_PATTERN.sub(r"\1", " ".join(line.split())) for line in text.splitlines() if line.strip())
+
+        if link not in pages:
+            pages[link] = ("" if anchor else title, [])
+        page_title, parts = pages[link]
+        if anchor:
+            parts.extend(part for part in (title, text) if part)
+        else:
+            pages[link] = (page_title or title, [text, *parts] if text else parts)
+
+    return [(title or link, link, "\n".join(parts)) for link, (title, parts) in pages.items()]
@@ -0,0 +1,147 @@
+"""
+Priority and deadline-aware scheduling of page fetches
+"""
+
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.parse import urlparse
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Path words of the pages worth fetching first, by rank
+REFERENCE_WORDS = {"api", "apidocs", "autoapi", "reference", "generated"}
+GUIDE_WORDS = {"guide", "userguide", "tutorial", "tutorials", "quickstart", "usage", "howto", "started"}
+# Path words of the pages worth fetching last
+LOW_PRIORITY_WORDS = {"changelog", "changes", "release", "releases", "whatsnew", "history", "license", "contributing", "genindex", "search"}
+# Path segments of the source listings Sphinx viewcode links to from the API reference
+SOURCE_SEGMENTS = {"_modules", "_sources"}
+
+
+@dataclass
+class ScheduledDocs:
+    """
+    The sections completed within the budget, and the pages left out
+
+    Attributes:
+        sections:   the section titles and their text, in priority order
+        skipped:    the links that were not fetched before the budget ran out, in priority order
+        failed:     the links that were fetched but returned no text
+        elapsed:    the time spent in seconds
+    """
+
+    sections: dict[str, str] = field(default_factory=dict)
+    skipped: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+def _category(path: str) -> int:
+    """
+    Rank a page by the kind of documentation its path suggests, lower first
+    """
+    words = set(TOKEN_PATTERN.findall(path.lower()))
+    if words & LOW_PRIORITY_WORDS or SOURCE_SEGMENTS.intersection(path.split("/")):
+        return 3
+    if words & REFERENCE_WORDS:
+        return 0
+    if words & GUIDE_WORDS:
+        return 1
+    return 2
+
+
+def rank_links(links: list[str], sizes: dict[str, int] | None = None) -> list[str]:
+    """
+    Order links by priority: API reference and user guide pages first,
+    then shallower paths, then smaller pages.
+
+    Args:
+        links:      the links to rank, duplicates are dropped
+        sizes:      the known sizes of some pages in bytes, e.g. from a previous run.
+                    Pages of unknown size rank after the ones of known size at the same depth.
+
+    Returns:
+        The links from the highest to the lowest priority
+    """
+    sizes = sizes or {}
+    unique_links = list(dict.fromkeys(links))
+
+    def priority(indexed_link: tuple[int, str]) -> tuple[int, int, float, int]:
+        index, link = indexed_link
+        path = urlparse(link).path
+        depth = len([segment for segment in path.split("/") if segment])
+        return _category(path), depth, sizes.get(link, float("inf")), index
+
+    return [link for _, link in sorted(enumerate(unique_links), key=priority)]
+
+
+def fetch_by_priority(
+    links: list[str],
+    fetch: Callable[[str], tuple[str, str] | None],
+    time_budget: float | None = None,
+    page_budget: int | None = None,
+    jobs: int = 8,
+) -> ScheduledDocs:
+    """
+    Fetch pages in the given order until the time or page budget runs out.
+
+    Pages still being fetched when the time budget runs out are abandoned,
+    so the call returns close to the deadline.
+
+    Args:
+        links:          the links in priority order
+        fetch:          a function returning the (title, text) of a link, None on failure
+        time_budget:    the number of seconds to spend, None for no limit
+        page_budget:    the maximum number of pages to fetch, None for no limit
+        jobs:           the number of pages fetched at once
+
+    Returns:
+        The completed sections in priority order with the skipped and failed links
+    """
+    started = time.monotonic()
+    deadline = None if time_budget is None else started + time_budget
+    to_fetch = links if page_budget is None else links[:page_budget]
+
+    completed: dict[str, tuple[str, str] | None] = {}
+    in_flight: dict[Future, str] = {}
+    pending = iter(to_fetch)
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        while True:
+            while len(in_flight) < jobs and (deadline is None or time.monotonic() < deadline):
+                link = next(pending, None)
+                if link is None:
+                    break
+                in_flight[executor.submit(fetch, link)] = link
+            if not in_flight:
+                break
+
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                link = in_flight.pop(future)
+                try:
+                    completed[link] = future.result()
+                except Exception as general_exception:  # pylint: disable=broad-exception-caught
+                    print(f"Failed to fetch {link}: {general_exception}")
+                    completed[link] = None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    result = ScheduledDocs()
+    for link in links:
+        if link not in completed:
+            result.skipped.append(link)
+            continue
+        page = completed[link]
+        if page is None:
+            result.failed.append(link)
+            continue
+        title, text = page
+        if title not in result.sections:
+            result.sections[title] = text
+    result.elapsed = time.monotonic() - started
+    return result
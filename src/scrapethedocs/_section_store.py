@@ -0,0 +1,150 @@
+"""
+Memory-budgeted storage for extracted sections
+"""
+
+import os
+import sys
+import tempfile
+from collections.abc import Iterator, MutableMapping
+from typing import BinaryIO
+
+# (offset, length) of a value written to the spill file
+_Spilled = tuple[int, int]
+
+
+def current_rss() -> int | None:
+    """
+    Get the resident set size of the current process.
+
+    Returns:
+        The RSS in bytes, None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss() -> int | None:
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        The peak RSS in bytes, None where the resource module is not available
+    """
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SectionStore(MutableMapping[str, str | None]):
+    """
+    A mapping of section titles to text that moves the text to a temporary
+    file once the text held in memory, or the RSS of the process, crosses a budget.
+
+    Iteration keeps insertion order, like the dict returned by extract_docs.
+    Values are read back from disk on access, so only one spilled section
+    is in memory at a time.
+    """
+
+    def __init__(self, memory_budget: int | None = None, rss_budget: int | None = None):
+        """
+        Args:
+            memory_budget:  the approximate number of bytes of text to keep in memory, counted
+                            in characters, None for no limit
+            rss_budget:     the process RSS in bytes above which text is spilled, None for no limit
+        """
+        self.memory_budget = memory_budget
+        self.rss_budget = rss_budget
+        self.memory_bytes = 0
+        self.spilled_count = 0
+        self._entries: dict[str, str | None | _Spilled] = {}
+        self._spill_file: BinaryIO | None = None
+        self._spilling = False
+
+    def _over_budget(self) -> bool:
+        if self.memory_budget is not None and self.memory_bytes > self.memory_budget:
+            return True
+        if self.rss_budget is not None:
+            rss = current_rss()
+            return rss is not None and rss > self.rss_budget
+        return False
+
+    def _spill(self, value: str) -> _Spilled:
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="scrapethedocs-")  # pylint: disable=consider-using-with
+        data = value.encode("utf-8")
+        offset = self._spill_file.seek(0, os.SEEK_END)
+        self._spill_file.write(data)
+        self.spilled_count += 1
+        return offset, len(data)
+
+    def _spill_all(self) -> None:
+        for key, value in self._entries.items():
+            if isinstance(value, str):
+                self._entries[key] = self._spill(value)
+        self.memory_bytes = 0
+
+    def __setitem__(self, key: str, value: str | None) -> None:
+        if key in self._entries:
+            del self[key]
+
+        if value is None:
+            self._entries[key] = None
+            return
+
+        if self._spilling:
+            self._entries[key] = self._spill(value)
+            return
+
+        self._entries[key] = value
+        self.memory_bytes += len(value)
+        if self._over_budget():
+            self._spilling = True
+            self._spill_all()
+
+    def __getitem__(self, key: str) -> str | None:
+        value = self._entries[key]
+        if not isinstance(value, tuple):
+            return value
+
+        assert self._spill_file is not None
+        offset, length = value
+        self._spill_file.seek(offset)
+        return self._spill_file.read(length).decode("utf-8")
+
+    def __delitem__(self, key: str) -> None:
+        value = self._entries.pop(key)
+        if isinstance(value, str):
+            self.memory_bytes -= len(value)
+        elif isinstance(value, tuple):
+            # The text stays in the spill file until close, but is no longer a spilled section
+            self.spilled_count -= 1
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        """
+        Delete the spill file. The store is empty afterwards.
+        """
+        self._entries.clear()
+        self.memory_bytes = 0
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def __enter__(self) -> "SectionStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -2,16 +2,36 @@
 Helper functions for text scraping
 """
 
+from __future__ import annotations
+
+import asyncio
 import re
 import string
-
-from aiohttp import ClientSession, TCPConnector
-from anyio import create_task_group
-from bs4 import BeautifulSoup, NavigableString, PageElement, Tag
-
-from scrapethedocs._helpers import _to_sync
-
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from scrapethedocs._helpers import _add_shutdown_hook, _to_sync
+from scrapethedocs._link_extraction import (
+    CHUNK_SIZE,
+    HTML_CONTENT_TYPES,
+    MAX_BODY_SIZE,
+    _get_encoding,
+    _is_acceptable,
+    _is_html_link,
+)
+from scrapethedocs._theme_detection import find_content_root
+
+# aiohttp, anyio and bs4 are imported by the functions using them, so importing the package stays fast
+if TYPE_CHECKING:
+    from aiohttp import ClientResponse, ClientSession
+    from bs4 import PageElement, Tag
+
+# The number of pages fetched at once by get_all_titles, which bounds the bodies held in memory
+MAX_IN_FLIGHT = 32
 TEXT_ELEMENTS = ["p", "h1", "h2", "h3", "h4", "h5", "h6", "pre"]
+# The elements descended into to reach the text elements, since themes nest their content in <section> and <article>
+CONTAINER_ELEMENTS = ["div", "section", "article", "main"]
 CONTENT_CLASSES = [
     "content",
     "main-content",
@@ -21,14 +41,125 @@ CONTENT_CLASSES = [
 ]
 
 
-async def _fetch_title_async(session: ClientSession, link: str, results: list[tuple[str, str]]) -> None:
+HEADING_LEVELS = {f"h{level}": level for level in range(1, 7)}
+# The starts of the lines clean_page_text never joins to the line before them
+SECTION_START_PREFIXES = ("Return type", ":rtype", "Parameters", ">>>", "...")
+
+
+@dataclass
+class Section:
+    """
+    A node of the heading tree of a page
+
+    Attributes:
+        level:      1 to 6 for <h1> to <h6>, 0 for the page itself
+        title:      the text of the heading
+        anchor:     the id to link to the heading with, None if it has none
+        text:       the text between the heading and the next heading, one line per text element
+        children:   the sections under the next heading level
+    """
+
+    level: int
+    title: str
+    anchor: str | None = None
+    text: str = ""
+    children: list[Section] = field(default_factory=list)
+
+    def walk(self) -> Iterator[Section]:
+        """
+        Iterate over this section and all sections below it in document order
+        """
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def find(self, anchor: str) -> Section | None:
+        """
+        Find the section with the given anchor, with or without the leading "#"
+
+        Args:
+            anchor:     the anchor of the section
+
+        Returns:
+            The section if found, None otherwise
+        """
+        anchor = anchor.lstrip("#")
+        return next((section for section in self.walk() if section.anchor == anchor), None)
+
+    def get_text(self) -> str:
+        """
+        Get the titles and text of this section and all sections below it
+
+        Returns:
+            The text in document order, one line per heading or text element
+        """
+        return "\n".join(part for section in self.walk() for part in (section.title, section.text) if part)
+
+
+_sessions: dict[asyncio.AbstractEventLoop, ClientSession] = {}
+
+
+async def _get_session() -> ClientSession:
+    """
+    Get the ClientSession shared by all requests made on the running event loop.
+
+    Returns:
+        The shared session, created on first use
+    """
+    import aiohttp  # pylint: disable=import-outside-toplevel
+
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector())
+        _sessions[loop] = session
+        _add_shutdown_hook(_close_session)
+    return session
+
+
+async def _close_session() -> None:
+    """
+    Close the session shared on the running event loop.
+    """
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+async def _read_limited(response: ClientResponse, max_size: int) -> bytes | None:
+    """
+    Read the body of a response, aborting once it grows past the maximum size.
+
+    Args:
+        response:   aiohttp's ClientResponse
+        max_size:   the maximum body size in bytes
+
+    Returns:
+        The body of the response
+        None if the body is larger than the maximum size
+    """
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        body.extend(chunk)
+        if len(body) > max_size:
+            print(f"Aborting the download of {response.url} after {len(body)} bytes")
+            return None
+    return bytes(body)
+
+
+async def _fetch_title_async(session: ClientSession, link: str, results: list[tuple[str, str]], max_size: int = MAX_BODY_SIZE) -> None:
     """
     Get the title of the specified URL.
 
+    Links to non-HTML resources are skipped without a request, and responses
+    with a non-HTML Content-Type or a body larger than max_size are skipped
+    before the body is parsed.
+
     Args:
         session:    aiohttp's ClientSession
         link:       the URL to get the title from
         results:    list to contain the results
+        max_size:   the maximum body size in bytes
 
     Returns:
         None
@@ -36,14 +167,31 @@ async def _fetch_title_async(session: ClientSession, link: str, results: list[tu
     Raises:
         ValueError: the GET request returns any response except 200
     """
-    # internal_link_response = await session.get(link)
+    from bs4 import BeautifulSoup  # pylint: disable=import-outside-toplevel
+
+    if not _is_html_link(link):
+        return
+
     async with session.get(link) as internal_link_response:
         if internal_link_response.status == 200:
-            soup = BeautifulSoup(await internal_link_response.text(), "html.parser")
+            if not _is_acceptable(
+                internal_link_response.headers.get("Content-Type"),
+                internal_link_response.content_length,
+                HTML_CONTENT_TYPES,
+                max_size,
+            ):
+                return
+            body = await _read_limited(internal_link_response, max_size)
+            if body is None:
+                return
+            encoding = _get_encoding(internal_link_response.headers.get("Content-Type"), body)
+            soup = BeautifulSoup(body, "html.parser", from_encoding=encoding)
             if soup.title is None or soup.title.string is None:
                 title = ""
             else:
-                title = soup.title.string
+                title = str(soup.title.string)
+            # Break the reference cycles of the tree now rather than at the next garbage collection
+            soup.decompose()
             results.append((title, link))
         else:
             print(internal_link_response.status)
@@ -51,78 +199,238 @@ async def _fetch_title_async(session: ClientSession, link: str, results: list[tu
 
 
 @_to_sync
-async def get_all_titles(links: list[str]) -> list[tuple[str, str]]:
+async def get_all_titles(links: list[str], max_size: int = MAX_BODY_SIZE, max_in_flight: int = MAX_IN_FLIGHT) -> list[tuple[str, str]]:
     """
     Get the titles for all links given.
 
     Args:
         links:          the list of links to get titles for. Invalid links are ignored
+        max_size:       the maximum body size in bytes, larger pages are skipped
+        max_in_flight:  the maximum number of pages fetched and parsed at once
 
     Returns:
         unique_titles:  a list of tuples (title, link) with duplicates removed
     """
+    import anyio  # pylint: disable=import-outside-toplevel
+
     results: list[tuple[str, str]] = []
-    connector = TCPConnector()
-    async with ClientSession(connector=connector) as session:
-        async with create_task_group() as tg:
-            for link in links:
-                tg.start_soon(_fetch_title_async, session, link, results)
+    session = await _get_session()
+    limiter = anyio.CapacityLimiter(max_in_flight)
+
+    async def fetch_title(link: str) -> None:
+        async with limiter:
+            await _fetch_title_async(session, link, results, max_size)
+
+    async with anyio.create_task_group() as tg:
+        for link in links:
+            tg.start_soon(fetch_title, link)
 
-        unique_titles = {}
+    unique_titles = {}
 
-        for result in results:
-            if result and result[0] not in unique_titles:
-                unique_titles[result[0]] = result[1]
+    for result in results:
+        if result and result[0] not in unique_titles:
+            unique_titles[result[0]] = result[1]
 
     return list(unique_titles.items())
 
 
-def get_page_text(text: str) -> str:
+def get_page_text(text: str | bytes, url: str | None = None, encoding: str | None = None) -> str:
     """
     Get all relevant text from URL contents.
 
     Args:
-        link:       the HTML contents of the document
+        text:       the HTML contents of the document, either decoded or as raw bytes
+        url:        the URL of the document, used to reuse the theme detected for its site
+        encoding:   the encoding of raw bytes contents, sniffed from the document if not given
 
     Returns:
         text:       the text of the document
     """
-    soup = BeautifulSoup(text, "html.parser")
+    return get_page_title_and_text(text, url, encoding)[1]
+
+
+def get_page_title_and_text(text: str | bytes, url: str | None = None, encoding: str | None = None) -> tuple[str, str]:
+    """
+    Get the title and all relevant text from URL contents in a single parse.
+
+    Args:
+        text:       the HTML contents of the document, either decoded or as raw bytes
+        url:        the URL of the document, used to reuse the theme detected for its site
+        encoding:   the encoding of raw bytes contents, sniffed from the document if not given
+
+    Returns:
+        title:      the <title> of the document, empty if it has none
+        text:       the text of the document
+    """
+    title, lines, _ = _parse_page(text, url, encoding)
+    return title, "\n".join(lines)
+
+
+def get_page_sections(text: str | bytes, url: str | None = None, encoding: str | None = None) -> Section:
+    """
+    Get the heading tree of URL contents.
+
+    The tree is built in the same traversal that collects the text for get_page_text,
+    so a sub-section can be looked up by anchor without parsing the text again.
+
+    Args:
+        text:       the HTML contents of the document, either decoded or as raw bytes
+        url:        the URL of the document, used to reuse the theme detected for its site
+        encoding:   the encoding of raw bytes contents, sniffed from the document if not given
+
+    Returns:
+        root:       a level 0 section titled with the <title> of the document,
+                    holding the text before the first heading and one child per top heading
+    """
+    return _parse_page(text, url, encoding)[2]
+
+
+def _heading_anchor(heading: Tag) -> str | None:
+    """
+    Find the id to link to a heading with.
+
+    Args:
+        heading:    the <h1> to <h6> element
+
+    Returns:
+        The id of the heading, of its Sphinx permalink or of the <section> it opens, None if it has none
+    """
+    import bs4  # pylint: disable=import-outside-toplevel
+
+    anchor = heading.get("id")
+    if not anchor:
+        headerlink = heading.find("a", class_="headerlink", href=True)
+        if isinstance(headerlink, bs4.Tag):
+            anchor = str(headerlink["href"]).lstrip("#")
+    # Sphinx puts the id on the <section> wrapping the heading
+    if not anchor and heading.parent is not None and heading.parent.find(list(HEADING_LEVELS), recursive=False) is heading:
+        anchor = heading.parent.get("id")
+    return str(anchor) if anchor else None
+
+
+class _SectionTreeBuilder:
+    """
+    Builds the heading tree of a page while its text is visited in document order
+    """
+
+    def __init__(self, title: str):
+        self.root = Section(0, title)
+        # The open sections from the root down, with the text lines collected for each
+        self.stack: list[tuple[Section, list[str]]] = [(self.root, [])]
+        self.collected: list[tuple[Section, list[str]]] = [self.stack[0]]
+        self.heading_depth = 0
+
+    def open_section(self, heading: Tag) -> Section:
+        """
+        Start the section of a heading, closing the open sections at its level or below
+        """
+        level = HEADING_LEVELS[heading.name]
+        while self.stack[-1][0].level >= level:
+            self.stack.pop()
+        section = Section(level, "", _heading_anchor(heading))
+        self.stack[-1][0].children.append(section)
+        self.stack.append((section, []))
+        self.collected.append(self.stack[-1])
+        self.heading_depth += 1
+        return section
+
+    def end_heading(self, section: Section, title_lines: list[str]) -> None:
+        """
+        Title a section with the text of its heading once the heading is visited
+        """
+        self.heading_depth -= 1
+        section.title = " ".join(line for line in title_lines if line)
+
+    def add_line(self, line: str) -> None:
+        """
+        Add a text line to the innermost open section, unless it belongs to a heading
+        """
+        if line and not self.heading_depth:
+            self.stack[-1][1].append(line)
+
+    def finish(self) -> Section:
+        """
+        Join the text lines of every section
+
+        Returns:
+            The root of the tree
+        """
+        for section, section_lines in self.collected:
+            section.text = "\n".join(section_lines)
+        return self.root
+
+
+def _find_relevant_content(element: Tag) -> Tag | None:
+    """
+    Find the first <div> with one of the CONTENT_CLASSES, depth first
+    """
+    if element.name == "div" and "class" in element.attrs and any(classname in element["class"] for classname in CONTENT_CLASSES):
+        return element
+    for child in element.findChildren(recursive=False):
+        found = _find_relevant_content(child)
+        if found is not None:
+            return found
+    return None
+
+
+def _parse_page(text: str | bytes, url: str | None = None, encoding: str | None = None) -> tuple[str, list[str], Section]:
+    """
+    Parse URL contents once into the title, the text lines and the heading tree.
+
+    Args:
+        text:       the HTML contents of the document, either decoded or as raw bytes
+        url:        the URL of the document, used to reuse the theme detected for its site
+        encoding:   the encoding of raw bytes contents, sniffed from the document if not given
+
+    Returns:
+        title:      the <title> of the document, empty if it has none
+        lines:      the non-empty text lines of the document
+        root:       the heading tree of the document
+    """
+    import bs4  # pylint: disable=import-outside-toplevel
+
+    if isinstance(text, bytes):
+        soup = bs4.BeautifulSoup(text, "html.parser", from_encoding=encoding or _get_encoding(None, text))
+    else:
+        soup = bs4.BeautifulSoup(text, "html.parser")
     lines = []
     processed_tags = set()
+    title = "" if soup.title is None or soup.title.string is None else str(soup.title.string)
+    tree = _SectionTreeBuilder(title)
+    descended = TEXT_ELEMENTS + CONTAINER_ELEMENTS
 
     def extract_text(element: PageElement) -> None:
         nonlocal lines
         nonlocal processed_tags
 
-        if isinstance(element, NavigableString):
+        if isinstance(element, bs4.NavigableString):
             print(element)
             text = element.strip()
             lines.append(text)
+            tree.add_line(text)
             processed_tags.add(element)
 
-        elif isinstance(element, Tag):
+        elif isinstance(element, bs4.Tag):
+            section = tree.open_section(element) if element.name in HEADING_LEVELS else None
+            start = len(lines)
             if any(True for _ in element.children):
                 for child in element:
-                    if (isinstance(child, Tag) and child.name in (TEXT_ELEMENTS + ["div"])) or isinstance(child, NavigableString):
+                    if isinstance(child, bs4.NavigableString) or (isinstance(child, bs4.Tag) and child.name in descended):
                         print(child)
                         extract_text(child)
+            if section is not None:
+                tree.end_heading(section, lines[start:])
 
-    def find_relevant_content(element: Tag) -> Tag | None:
-        if element.name == "div" and "class" in element.attrs and any(classname in element["class"] for classname in CONTENT_CLASSES):
-            return element
-        for child in element.findChildren(recursive=False):
-            found = find_relevant_content(child)
-            if found is not None:
-                return found
-        return None
-
-    content_div = find_relevant_content(soup)
+    content_div = find_content_root(soup, url)
+    if content_div is None:
+        content_div = _find_relevant_content(soup)
     if content_div is not None:
         extract_text(content_div)
 
+    # Break the reference cycles of the tree now rather than at the next garbage collection
+    soup.decompose()
     lines = [line for line in lines if len(line) > 0]
-    return "\n".join(lines)
+    return title, lines, tree.finish()
 
 
 def clean_page_text(text: str) -> str:
@@ -167,9 +475,7 @@ def clean_page_text(text: str) -> str:
     # Combine lines for improved readability
     idx = 0
     while idx < len(cleaned_lines) - 1:
-        if not cleaned_lines[idx].endswith((".", ",", ":")) and not cleaned_lines[idx + 1].startswith(
-            ("Return type", ":rtype", "Parameters", ">>>", "...")
-        ):
+        if not cleaned_lines[idx].endswith((".", ",", ":")) and not cleaned_lines[idx + 1].startswith(SECTION_START_PREFIXES):
             cleaned_lines[idx] += " " + cleaned_lines.pop(idx + 1)
         else:
             idx += 1
@@ -0,0 +1,140 @@
+"""
+Helper functions for documentation theme detection
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+# bs4 and soupsieve are imported by the functions using them, so importing the package stays fast
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
+    from soupsieve import SoupSieve
+
+SPHINX_RTD = "sphinx-rtd-theme"
+PYDATA_SPHINX = "pydata-sphinx-theme"
+FURO = "furo"
+SPHINX_BASIC = "sphinx"
+MKDOCS_MATERIAL = "mkdocs-material"
+MKDOCS = "mkdocs"
+PDOC = "pdoc"
+
+# Ordered from the most to the least specific layout, since the generic
+# themes share markers with the ones built on top of them
+THEME_SELECTORS = {
+    MKDOCS_MATERIAL: "article.md-content__inner",
+    PDOC: "main.pdoc",
+    PYDATA_SPHINX: "article.bd-article",
+    FURO: "article[role=main]",
+    SPHINX_RTD: "div.rst-content",
+    SPHINX_BASIC: "div.body[role=main]",
+    MKDOCS: "div[role=main]",
+}
+
+# Substrings of <meta name="generator"> content, checked in order
+GENERATOR_MARKERS = [
+    ("mkdocs-material", MKDOCS_MATERIAL),
+    ("mkdocs", MKDOCS),
+    ("pdoc", PDOC),
+    ("furo", FURO),
+    ("pydata-sphinx-theme", PYDATA_SPHINX),
+]
+
+# The theme of every site seen so far, None for a site whose theme is not recognized
+_theme_cache: dict[str, str | None] = {}
+
+
+@cache
+def _compiled_selector(theme: str) -> SoupSieve:
+    """
+    Compile the content root selector of a theme once per process.
+
+    Args:
+        theme:      the name of the theme
+
+    Returns:
+        The compiled selector
+    """
+    import soupsieve  # pylint: disable=import-outside-toplevel
+
+    return soupsieve.compile(THEME_SELECTORS[theme])
+
+
+def detect_theme(soup: BeautifulSoup) -> str | None:
+    """
+    Detect the generator and theme a documentation page was built with.
+
+    Args:
+        soup:       the parsed HTML of the page
+
+    Returns:
+        The name of the theme if recognized, None otherwise
+    """
+    import bs4  # pylint: disable=import-outside-toplevel
+
+    generator = soup.find("meta", attrs={"name": "generator"})
+    if isinstance(generator, bs4.Tag):
+        content = str(generator.get("content", "")).lower()
+        for marker, theme in GENERATOR_MARKERS:
+            if marker in content:
+                return theme
+
+    for theme in THEME_SELECTORS:
+        if _compiled_selector(theme).select_one(soup) is not None:
+            return theme
+    return None
+
+
+def _site_key(url: str) -> str:
+    """
+    Get the part of a URL identifying the documentation site a page belongs to.
+
+    Args:
+        url:        the URL of the page
+
+    Returns:
+        The host followed by the first directory of the path, so the projects
+        hosted side by side on e.g. user.github.io are told apart
+    """
+    parsed = urlparse(url)
+    segments = parsed.path.split("/")
+    # segments[0] is empty, and the last segment is a page name or empty
+    directory = segments[1] if len(segments) > 2 else ""
+    return f"{parsed.netloc}/{directory}" if directory else parsed.netloc
+
+
+def find_content_root(soup: BeautifulSoup, url: str | None = None) -> Tag | None:
+    """
+    Find the content root of a page using the selector of the site's theme.
+
+    The theme is detected on the first page of every site and cached, so later
+    pages of the same site go straight to the precompiled selector, or straight
+    to the fallback of the caller if the theme was not recognized.
+
+    Args:
+        soup:       the parsed HTML of the page
+        url:        the URL of the page, used to key the cache by site
+
+    Returns:
+        The content root if the theme is known and its selector matches, None otherwise
+    """
+    site = _site_key(url) if url else ""
+    if site and site in _theme_cache:
+        theme = _theme_cache[site]
+    else:
+        theme = detect_theme(soup)
+        if site:
+            _theme_cache[site] = theme
+
+    if theme is None:
+        return None
+    return _compiled_selector(theme).select_one(soup)
+
+
+def clear_theme_cache() -> None:
+    """
+    Forget the themes detected so far.
+    """
+    _theme_cache.clear()
@@ -0,0 +1,240 @@
+"""
+Work queues shared by scraping workers in several processes or on several hosts
+"""
+
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+PACKAGE_JOB = "package"
+PAGE_JOB = "page"
+LEASE_SECONDS = 300.0
+MAX_ATTEMPTS = 3
+
+
+@dataclass
+class Job:
+    """
+    A unit of work leased to one worker
+
+    Attributes:
+        id:         the identifier of the job in the queue
+        kind:       PACKAGE_JOB or PAGE_JOB
+        payload:    the JSON-serializable description of the work
+        attempts:   the number of times the job was leased, including this one
+    """
+
+    id: int
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+class WorkQueue(ABC):
+    """
+    A queue of jobs with leases, acknowledgements and retries.
+
+    A leased job is invisible to other workers until its lease expires.
+    A worker that dies without acknowledging a job lets the lease expire,
+    and the job is leased again, up to max_attempts times in total.
+    Implementations must make lease atomic across processes.
+    """
+
+    @abstractmethod
+    def put(self, kind: str, payload: dict[str, Any]) -> bool:
+        """
+        Add a job unless the same job was added before
+
+        Args:
+            kind:       the kind of job
+            payload:    the JSON-serializable description of the work
+
+        Returns:
+            True if the job was added, False if it was already in the queue
+        """
+
+    @abstractmethod
+    def lease(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> Job | None:
+        """
+        Take the oldest available job for a while
+
+        Args:
+            worker:         the identifier of the worker taking the job
+            lease_seconds:  how long the job stays reserved for the worker
+
+        Returns:
+            The job, None if no job is available right now
+        """
+
+    @abstractmethod
+    def ack(self, job: Job, worker: str, result: Any = None) -> bool:
+        """
+        Mark a leased job as done
+
+        Args:
+            job:        the job leased by the worker
+            worker:     the identifier of the worker
+            result:     the JSON-serializable result of the job
+
+        Returns:
+            True if the job was done, False if the lease was lost to another worker
+        """
+
+    @abstractmethod
+    def nack(self, job: Job, worker: str, error: str) -> None:
+        """
+        Give a leased job back after a failure, to be retried unless it ran out of attempts
+
+        Args:
+            job:        the job leased by the worker
+            worker:     the identifier of the worker
+            error:      a description of the failure
+        """
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """
+        Count the jobs by status
+
+        Returns:
+            The number of "pending", "leased", "done" and "failed" jobs
+        """
+
+    @abstractmethod
+    def results(self, kind: str) -> Iterator[tuple[dict[str, Any], Any]]:
+        """
+        Iterate over the finished jobs of a kind in the order they were added
+
+        Args:
+            kind:       the kind of job
+
+        Returns:
+            Pairs of the payload and the result of every done job
+        """
+
+    def is_drained(self) -> bool:
+        """
+        Check whether every job is either done or failed
+
+        Returns:
+            True if no job is pending or leased
+        """
+        counts = self.counts()
+        return counts["pending"] == 0 and counts["leased"] == 0
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    A WorkQueue stored in one SQLite file.
+
+    Every process opens its own connection to the same file, and leases are taken
+    in an immediate transaction so only one worker wins each job. Hosts sharing the
+    file need a file system with working locks; prefer a networked backend otherwise.
+    """
+
+    def __init__(self, path: str, max_attempts: int = MAX_ATTEMPTS, timeout: float = 30.0):
+        """
+        Args:
+            path:           the path to the SQLite file, created if missing
+            max_attempts:   the number of leases after which a job is marked failed
+            timeout:        the number of seconds to wait for another process holding the lock
+        """
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                leased_until REAL,
+                result TEXT,
+                error TEXT,
+                UNIQUE (kind, payload)
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def put(self, kind: str, payload: dict[str, Any]) -> bool:
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO jobs (kind, payload) VALUES (?, ?)",
+            (kind, json.dumps(payload, sort_keys=True)),
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> Job | None:
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs of dead workers that ran out of attempts will not be retried
+            self.connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired' WHERE status = 'leased' AND leased_until < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = self.connection.execute(
+                "SELECT id, kind, payload, attempts FROM jobs"
+                " WHERE status = 'pending' OR (status = 'leased' AND leased_until < ?) ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                self.connection.execute("COMMIT")
+                return None
+
+            job_id, kind, payload, attempts = row
+            self.connection.execute(
+                "UPDATE jobs SET status = 'leased', attempts = ?, worker = ?, leased_until = ? WHERE id = ?",
+                (attempts + 1, worker, now + lease_seconds, job_id),
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        return Job(job_id, kind, json.loads(payload), attempts + 1)
+
+    def ack(self, job: Job, worker: str, result: Any = None) -> bool:
+        cursor = self.connection.execute(
+            "UPDATE jobs SET status = 'done', result = ?, leased_until = NULL WHERE id = ? AND status = 'leased' AND worker = ?",
+            (json.dumps(result), job.id, worker),
+        )
+        return cursor.rowcount == 1
+
+    def nack(self, job: Job, worker: str, error: str) -> None:
+        self.connection.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, error = ?, leased_until = NULL"
+            " WHERE id = ? AND status = 'leased' AND worker = ?",
+            (self.max_attempts, error, job.id, worker),
+        )
+
+    def counts(self) -> dict[str, int]:
+        now = time.time()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        # Expired leases are counted as what the next lease will turn them into
+        rows = self.connection.execute(
+            "SELECT CASE WHEN status != 'leased' OR leased_until >= ? THEN status WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+            " COUNT(*) FROM jobs GROUP BY 1",
+            (now, self.max_attempts),
+        )
+        for status, count in rows:
+            counts[status] += count
+        return counts
+
+    def results(self, kind: str) -> Iterator[tuple[dict[str, Any], Any]]:
+        rows = self.connection.execute("SELECT payload, result FROM jobs WHERE kind = ? AND status = 'done' ORDER BY id", (kind,))
+        for payload, result in rows:
+            yield json.loads(payload), json.loads(result)
+
+    def close(self) -> None:
+        """
+        Close the connection to the SQLite file
+        """
+        self.connection.close()
@@ -0,0 +1,71 @@
+"""
+Tests for the _boilerplate functions
+"""
+
+from scrapethedocs._boilerplate import BoilerplateCounter, strip_lines
+
+PAGES = [
+    "Navigation\nIntro text\nPrevious\nNext\n© Copyright 2024",
+    "Navigation\nUsage text\nimport example\nPrevious\nNext\n© Copyright 2024",
+    "Navigation\nAPI text\nimport example\n  Previous  \n© Copyright 2024",
+    "Navigation\nFAQ text\n\nNext\n© Copyright 2024",
+]
+
+
+def test_boilerplate_counter():
+    """
+    Test that only lines above the threshold are boilerplate
+    """
+    counter = BoilerplateCounter()
+    for page in PAGES:
+        counter.add(page)
+
+    boilerplate = counter.boilerplate(threshold=0.7)
+
+    assert counter.pages == 4
+    assert boilerplate == {hash("Navigation"), hash("Previous"), hash("Next"), hash("© Copyright 2024")}
+    assert strip_lines(PAGES[1], boilerplate) == "Usage text\nimport example"
+    assert strip_lines(PAGES[2], boilerplate) == "API text\nimport example"
+
+
+def test_boilerplate_counter_counts_pages_not_lines():
+    """
+    Test that a line repeated within one page counts once
+    """
+    counter = BoilerplateCounter()
+    counter.add("Example\nExample\nExample")
+    counter.add("Other")
+    counter.add("Another")
+
+    assert counter.boilerplate(threshold=0.5) == set()
+
+
+def test_boilerplate_counter_too_few_pages():
+    """
+    Test that nothing is boilerplate on a site with too few pages
+    """
+    counter = BoilerplateCounter()
+    counter.add("Navigation\nIntro")
+    counter.add("Navigation\nUsage")
+
+    assert counter.boilerplate() == set()
+    assert strip_lines("Navigation\nIntro", counter.boilerplate()) == "Navigation\nIntro"
+
+
+def test_boilerplate_counter_keeps_structural_lines():
+    """
+    Test that docstring section headings repeated on every reference page are kept
+    """
+    return_types = ["int", "str", "bool", "float", "None"]
+    pages = [
+        f"Navigation\nfunc{i}(a, b)\nParameters\na - value {i}\nReturn type\n{return_type}\nExamples\n>>> import example"
+        for i, return_type in enumerate(return_types)
+    ]
+    counter = BoilerplateCounter()
+    for page in pages:
+        counter.add(page)
+
+    boilerplate = counter.boilerplate()
+
+    assert boilerplate == {hash("Navigation")}
+    assert strip_lines(pages[0], boilerplate) == "func0(a, b)\nParameters\na - value 0\nReturn type\nint\nExamples\n>>> import example"
@@ -0,0 +1,91 @@
+"""
+Tests for the command-line entry point
+"""
+
+import json
+
+import pytest
+from pytest_mock import MockerFixture
+
+from scrapethedocs._cli import main, read_requirements
+
+DOC_URLS = {"alpha": "https://alpha.example.com", "beta": "https://beta.example.com", "broken": None}
+
+
+@pytest.fixture(name="pipeline")
+def fixture_pipeline(mocker: MockerFixture):
+    """
+    Mock the scraping pipeline with two sections per documented package
+    """
+    mocker.patch("scrapethedocs._cli.get_doc_home_url", side_effect=DOC_URLS.get)
+    mocker.patch(
+        "scrapethedocs._cli.get_section_titles",
+        side_effect=lambda url: [("Intro", f"{url}/intro"), ("API", f"{url}/api")],
+    )
+    return mocker.patch("scrapethedocs._cli.extract_page", side_effect=lambda link, **_: f"Text of {link}")
+
+
+def test_read_requirements(tmp_path):
+    """
+    Test package name parsing from a requirements file
+    """
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text(
+        "# comment\n-r other.txt\nalpha==1.0\nbeta[extra]>=2 ; python_version > '3.8'\n"
+        "git+https://example.com/repo.git\n./local\nalpha\nGamma_Pkg  # trailing\n"
+    )
+
+    assert read_requirements(str(requirements)) == ["alpha", "beta", "Gamma_Pkg"]
+
+
+def test_main_output_dir(tmp_path, pipeline):
+    """
+    Test writing one file per package
+    """
+    exit_code = main(["alpha", "beta", "-j", "2", "-o", str(tmp_path), "-q"])
+
+    assert exit_code == 0
+    assert pipeline.call_count == 4
+    record = json.loads((tmp_path / "alpha.json").read_text())
+    assert record == {
+        "package": "alpha",
+        "url": "https://alpha.example.com",
+        "sections": {"Intro": "Text of https://alpha.example.com/intro", "API": "Text of https://alpha.example.com/api"},
+    }
+    assert (tmp_path / "beta.json").is_file()
+
+
+def test_main_jsonl_with_failure(tmp_path, pipeline, capsys):
+    """
+    Test streaming to JSONL, a failing package and the summary
+    """
+    jsonl = tmp_path / "docs.jsonl"
+    exit_code = main(["alpha", "broken", "--jsonl", str(jsonl), "-q"])
+
+    assert exit_code == 1
+    assert pipeline.call_count == 2
+    assert [json.loads(line)["package"] for line in jsonl.read_text().splitlines()] == ["alpha"]
+    summary = capsys.readouterr().err
+    assert "broken" in summary and "no documentation URL on PyPI" in summary
+
+
+def test_main_resume(tmp_path, pipeline):
+    """
+    Test that a resumed run skips the packages already written
+    """
+    jsonl = tmp_path / "docs.jsonl"
+    jsonl.write_text(json.dumps({"package": "alpha", "url": "", "sections": {}}) + "\n" + '{"package": "be')
+
+    exit_code = main(["alpha", "beta", "--jsonl", str(jsonl), "--resume", "-q"])
+
+    assert exit_code == 0
+    assert {call.args[0] for call in pipeline.call_args_list} == {"https://beta.example.com/intro", "https://beta.example.com/api"}
+    assert json.loads(jsonl.read_text().splitlines()[-1])["package"] == "beta"
+
+
+def test_main_requires_packages(tmp_path):
+    """
+    Test that running without packages is an error
+    """
+    with pytest.raises(SystemExit):
+        main(["-o", str(tmp_path)])
@@ -112,14 +112,14 @@ extract_page_test_cases = [
     # Case: _get returns a response, and get_page_text and clean_page_text process it
     (
         "https://docs.example.com",
-        Mock(text="Raw HTML content"),
+        Mock(content=b"Raw HTML content", headers={}),
         "Extracted page text",
         "Cleaned page text",
     ),
     # Case: _get returns a response, but get_page_text returns an empty string
     (
         "https://docs.example.com",
-        Mock(text="Another raw HTML content"),
+        Mock(content=b"Another raw HTML content", headers={"Content-Type": "text/html; charset=ISO-8859-1"}),
         "",
         "",
     ),
@@ -164,3 +164,68 @@ extract_docs_test_cases = [
         },  # Expected result
     ),
 ]
+
+
+detect_theme_test_cases = [
+    # Test detection from the generator meta tag
+    ("<meta name='generator' content='mkdocs-1.5.3, mkdocs-material-9.4.2'>", "mkdocs-material"),
+    ("<meta name='generator' content='pdoc 14.1.0'>", "pdoc"),
+    ("<meta name='generator' content='sphinx-7.2.6, furo 2023.09.10'>", "furo"),
+    # Test detection from the page layout
+    ("<div class='bd-main'><article class='bd-article'><p>Text</p></article></div>", "pydata-sphinx-theme"),
+    ("<div class='wy-nav-content'><div class='rst-content'><p>Text</p></div></div>", "sphinx-rtd-theme"),
+    ("<div class='documentwrapper'><div class='body' role='main'><p>Text</p></div></div>", "sphinx"),
+    # Test a generic generator falling back to the layout
+    ("<meta name='generator' content='Docutils 0.20.1'><div class='rst-content'></div>", "sphinx-rtd-theme"),
+    # Test an unknown layout
+    ("<div class='main-content'><p>Text</p></div>", None),
+]
+
+
+theme_page_test_cases = [
+    # Test Furo, which nests the sections of a page in <article role="main">
+    (
+        """<html><head><meta name="generator" content="Sphinx 7.2.6, furo 2024.01.29"><title>Usage - pkg</title></head>
+        <body><div class="page"><aside class="sidebar-drawer"><div class="sidebar-container"><p>Navigation</p></div></aside>
+        <div class="main"><div class="content"><article role="main" id="furo-main-content">
+        <section id="usage"><h1>Usage<a class="headerlink" href="#usage">¶</a></h1><p>Install the package.</p>
+        <section id="api"><h2>API<a class="headerlink" href="#api">¶</a></h2><p>Call it.</p></section></section>
+        </article></div></div></div></body></html>""",
+        "Usage\nInstall the package.\nAPI\nCall it.",
+    ),
+    # Test pdoc, which puts every member in its own <section> under <main class="pdoc">
+    (
+        """<html><head><meta name="generator" content="pdoc 14.4.0"><title>pkg API documentation</title></head>
+        <body><nav class="pdoc"><p>Contents</p></nav><main class="pdoc">
+        <section class="module-info"><h1 class="modulename">pkg</h1><div class="docstring"><p>Module doc.</p></div></section>
+        <section id="func"><div class="attr function"><span class="def">def</span> <span class="name">func</span></div>
+        <div class="docstring"><p>Does things.</p></div></section>
+        </main></body></html>""",
+        "pkg\nModule doc.\nDoes things.",
+    ),
+    # Test the PyData theme, which nests the sections of a page in <article class="bd-article">
+    (
+        """<html><head><meta name="generator" content="Docutils 0.20.1: https://docutils.sourceforge.io/"></head>
+        <body><div class="bd-container"><div class="bd-sidebar-primary"><p>Navigation</p></div>
+        <div class="bd-main"><div class="bd-content"><div class="bd-article-container"><article class="bd-article">
+        <section id="getting-started"><h1>Getting started</h1><p>Install it.</p></section>
+        </article></div></div></div></div></body></html>""",
+        "Getting started\nInstall it.",
+    ),
+]
+
+
+get_encoding_test_cases = [
+    # Test the charset declared in the Content-Type header
+    ("text/html; charset=ISO-8859-1", b"<html></html>", "iso8859-1"),
+    # Test the header taking priority over the document
+    ("text/html; charset=utf-8", b"<meta charset='windows-1252'>", "utf-8"),
+    # Test sniffing <meta charset>
+    ("text/html", b"<html><head><meta charset='windows-1252'></head></html>", "cp1252"),
+    # Test sniffing the legacy http-equiv declaration
+    (None, b'<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">', "shift_jis"),
+    # Test an unknown charset
+    ("text/html; charset=not-a-charset", b"<html></html>", "utf-8"),
+    # Test no declaration at all
+    (None, b"<html></html>", "utf-8"),
+]
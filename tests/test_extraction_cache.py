@@ -0,0 +1,126 @@
+"""
+Tests for the persistent cache of extracted page text
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from scrapethedocs import extract_page
+from scrapethedocs._extraction_cache import (
+    ExtractionCache,
+    default_cache_path,
+    extractor_version,
+)
+
+OPTIONS = {"encoding": "utf-8", "host": "docs.example.com"}
+
+
+@pytest.fixture(name="cache_path")
+def fixture_cache_path(tmp_path):
+    """
+    A path for a fresh cache file
+    """
+    return tmp_path / "cache" / "extraction.sqlite"
+
+
+def test_get_put(cache_path):
+    """
+    Test that a stored text is returned for the same body and options only
+    """
+    cache = ExtractionCache(cache_path)
+
+    assert cache.get(b"<p>Body</p>", OPTIONS) is None
+    cache.put(b"<p>Body</p>", OPTIONS, "Body")
+
+    assert cache.get(b"<p>Body</p>", OPTIONS) == "Body"
+    assert cache.get(b"<p>Other</p>", OPTIONS) is None
+    assert cache.get(b"<p>Body</p>", {**OPTIONS, "encoding": "cp1252"}) is None
+    assert cache.stats() == {"hits": 1, "misses": 3, "hit_rate": 0.25, "entries": 1, "bytes": 4}
+
+
+def test_persistence(cache_path):
+    """
+    Test that entries survive reopening the cache
+    """
+    cache = ExtractionCache(cache_path)
+    cache.put(b"<p>Body</p>", OPTIONS, "Body")
+    cache.close()
+
+    assert ExtractionCache(cache_path).get(b"<p>Body</p>", OPTIONS) == "Body"
+
+
+def test_lru_eviction(cache_path):
+    """
+    Test that the least recently used entries are evicted once the size limit is crossed
+    """
+    cache = ExtractionCache(cache_path, max_bytes=10)
+    cache.put(b"first", OPTIONS, "aaaa")
+    cache.put(b"second", OPTIONS, "bbbb")
+    assert cache.get(b"first", OPTIONS) == "aaaa"
+
+    cache.put(b"third", OPTIONS, "cccc")
+
+    assert cache.get(b"first", OPTIONS) == "aaaa"
+    assert cache.get(b"second", OPTIONS) is None
+    assert cache.get(b"third", OPTIONS) == "cccc"
+    assert cache.stats()["bytes"] == 8
+
+
+def test_totals_follow_replace_and_clear(cache_path):
+    """
+    Test that the running totals stay exact when an entry is replaced or the cache is cleared
+    """
+    cache = ExtractionCache(cache_path)
+    cache.put(b"first", OPTIONS, "aaaa")
+    cache.put(b"first", OPTIONS, "aaaaaa")
+    cache.put(b"second", OPTIONS, "bb")
+
+    assert (cache.stats()["entries"], cache.stats()["bytes"]) == (2, 8)
+    cache.close()
+    assert ExtractionCache(cache_path).stats()["bytes"] == 8
+
+    cache = ExtractionCache(cache_path)
+    cache.clear()
+    assert (cache.stats()["entries"], cache.stats()["bytes"]) == (0, 0)
+
+
+def test_config_change_invalidates(cache_path, monkeypatch):
+    """
+    Test that changing the extraction configuration invalidates the stored entries
+    """
+    cache = ExtractionCache(cache_path)
+    cache.put(b"<p>Body</p>", OPTIONS, "Body")
+    version = extractor_version()
+
+    monkeypatch.setattr("scrapethedocs._text_extraction.CONTENT_CLASSES", ["another-content-class"])
+
+    assert extractor_version() != version
+    assert cache.get(b"<p>Body</p>", OPTIONS) is None
+    cache.close()
+    # Entries of other versions are deleted when the cache is opened
+    assert ExtractionCache(cache_path).stats()["entries"] == 0
+
+
+def test_default_cache_path(tmp_path, monkeypatch):
+    """
+    Test that the default cache location follows XDG_CACHE_HOME
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+    assert default_cache_path() == tmp_path / "scrapethedocs" / "extraction.sqlite"
+
+
+def test_extract_page_cached(mocker, cache_path):
+    """
+    Test that extract_page parses an unchanged page only once
+    """
+    mocker.patch("scrapethedocs._get", return_value=Mock(content=b"<p>Body</p>", headers={"Content-Type": "text/html; charset=utf-8"}))
+    mock_get_page_text = mocker.patch("scrapethedocs.get_page_text", return_value="Body")
+    cache = ExtractionCache(cache_path)
+
+    assert extract_page("https://docs.example.com/page", cache=cache) == "Body"
+    assert extract_page("https://docs.example.com/page", cache=cache) == "Body"
+
+    mock_get_page_text.assert_called_once()
+    assert cache.stats()["hit_rate"] == 0.5
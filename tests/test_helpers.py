@@ -0,0 +1,84 @@
+"""
+Tests for the _helpers functions
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scrapethedocs import _helpers
+from scrapethedocs._helpers import _add_shutdown_hook, _to_sync, shutdown
+
+
+@_to_sync
+async def _current_thread_name(value: int) -> tuple[int, str]:
+    """
+    Report the thread the coroutine runs on
+    """
+    await asyncio.sleep(0)
+    return value, threading.current_thread().name
+
+
+def test_to_sync_reuses_background_loop():
+    """
+    Test that consecutive calls run on the same background loop
+    """
+    assert _current_thread_name(1) == (1, "scrapethedocs-loop")
+    loop = _helpers._loop  # pylint: disable=protected-access
+    assert _current_thread_name(2) == (2, "scrapethedocs-loop")
+    assert _helpers._loop is loop  # pylint: disable=protected-access
+
+
+@pytest.mark.asyncio
+async def test_to_sync_inside_running_loop():
+    """
+    Test a synchronous call from a thread that is already running an event loop
+    """
+    assert _current_thread_name(3) == (3, "scrapethedocs-loop")
+
+
+def test_to_sync_from_many_threads():
+    """
+    Test concurrent synchronous calls from several threads
+    """
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_current_thread_name, range(32)))
+
+    assert results == [(i, "scrapethedocs-loop") for i in range(32)]
+
+
+def test_to_sync_inside_background_loop():
+    """
+    Test that a synchronous call from the background loop itself is refused
+    """
+
+    @_to_sync
+    async def nested() -> int:
+        return _current_thread_name(4)[0]
+
+    with pytest.raises(RuntimeError, match="inside the scrapethedocs event loop"):
+        nested()
+
+
+def test_shutdown_runs_hooks_and_restarts():
+    """
+    Test that shutdown runs the hooks, stops the loop, and a later call starts a new one
+    """
+    calls = []
+
+    async def hook() -> None:
+        calls.append(threading.current_thread().name)
+
+    _current_thread_name(5)
+    loop = _helpers._loop  # pylint: disable=protected-access
+    _add_shutdown_hook(hook)
+
+    shutdown()
+    shutdown()
+
+    assert calls == ["scrapethedocs-loop"]
+    assert loop is not None and loop.is_closed()
+    assert _current_thread_name(6) == (6, "scrapethedocs-loop")
+    assert _helpers._loop is not loop  # pylint: disable=protected-access
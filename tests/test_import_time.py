@@ -0,0 +1,111 @@
+"""
+Import-time regression tests for the scrapethedocs package
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import scrapethedocs
+
+# asyncio, and the ssl module it loads, are imported normally since other libraries share the module objects
+HEAVY_MODULES = ["requests", "aiohttp", "anyio", "bs4", "soupsieve"]
+# Generous enough for slow CI machines, far below the cost of the heavy dependencies
+MAX_IMPORT_TIME_US = 150_000
+
+
+def _run_fresh(statement: str, *options: str) -> subprocess.CompletedProcess:
+    """
+    Run a statement in a fresh interpreter, where nothing but the package has imported anything yet
+
+    Returns:
+        The completed process, with its output captured
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(Path(scrapethedocs.__file__).parents[1]), env.get("PYTHONPATH", "")])
+    return subprocess.run([sys.executable, *options, "-c", statement], capture_output=True, text=True, env=env, check=True, timeout=60)
+
+
+def _import_times(statement: str) -> dict[str, int]:
+    """
+    Run a statement in a fresh interpreter with -X importtime
+
+    Returns:
+        A mapping of every imported module to its cumulative import time in microseconds
+    """
+    completed = _run_fresh(statement, "-X", "importtime")
+
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("statement", ["import scrapethedocs", "from scrapethedocs import get_doc_home_url, extract_docs"])
+def test_import_skips_heavy_dependencies(statement):
+    """
+    Test that importing the package does not load the fetch and parse dependencies
+    """
+    times = _import_times(statement)
+
+    assert "scrapethedocs" in times
+    assert not [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+    assert times["scrapethedocs"] < MAX_IMPORT_TIME_US
+
+
+def test_heavy_dependencies_load_on_first_use():
+    """
+    Test that a parse function works after a fast import, loading only what it needs
+    """
+    times = _import_times("import scrapethedocs; assert scrapethedocs.get_page_text(\"<div class='content'><p>Text</p></div>\") == 'Text'")
+
+    loaded = {name.split(".")[0] for name in times}
+    assert "bs4" in loaded
+    assert "aiohttp" not in loaded
+
+
+def test_first_use_from_many_threads():
+    """
+    Test that the deferred imports are safe when many threads use them at once, as with the CLI's jobs
+    """
+    completed = _run_fresh(
+        "import threading\n"
+        "import scrapethedocs\n"
+        "from scrapethedocs._link_extraction import _get\n"
+        "errors = []\n"
+        "def use():\n"
+        "    try:\n"
+        "        assert _get('not a url') is None\n"
+        "        assert scrapethedocs.get_page_text(\"<div class='rst-content'><p>Text</p></div>\", 'https://a.example.com') == 'Text'\n"
+        "    except Exception as exception:\n"
+        "        errors.append(exception)\n"
+        "threads = [threading.Thread(target=use) for _ in range(16)]\n"
+        "for thread in threads:\n"
+        "    thread.start()\n"
+        "for thread in threads:\n"
+        "    thread.join()\n"
+        "print(errors)"
+    )
+
+    assert completed.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_sync_wrapper_in_fresh_interpreter():
+    """
+    Test that a synchronous wrapper works, and leaves asyncio usable, when the package is the first thing imported
+    """
+    completed = _run_fresh(
+        "import scrapethedocs\n"
+        "assert scrapethedocs.get_all_titles([]) == []\n"
+        "from asyncio import Queue\n"
+        "import unittest.mock\n"
+        "print('ok')"
+    )
+
+    assert completed.stdout.strip() == "ok"
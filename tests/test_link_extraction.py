@@ -2,10 +2,24 @@
 Tests for the _link_extraction functions
 """
 
+import gzip
+import json
+
+import pytest
 import requests
 from pytest_mock import MockerFixture
+from test_data import get_encoding_test_cases
 
-from scrapethedocs._link_extraction import _get, extract_links_by_class
+from scrapethedocs._link_extraction import (
+    HTML_CONTENT_TYPES,
+    _get,
+    _get_encoding,
+    _is_html_link,
+    _site_dir,
+    extract_links_by_class,
+    extract_links_from_sitemap,
+    extract_mkdocs_search_index,
+)
 
 
 def test_get_success(mocker: MockerFixture):
@@ -14,6 +28,8 @@ def test_get_success(mocker: MockerFixture):
     """
     mock_response = mocker.Mock()
     mock_response.status_code = 200
+    mock_response.headers = {"Content-Type": "text/html"}
+    mock_response.iter_content.return_value = [b"<html>Test Page</html>"]
     mock_response.text = "<html>Test Page</html>"
 
     mocker.patch("requests.get", return_value=mock_response)
@@ -22,6 +38,7 @@ def test_get_success(mocker: MockerFixture):
     assert response is not None
     assert response.status_code == 200
     assert response.text == "<html>Test Page</html>"
+    assert response._content == b"<html>Test Page</html>"  # pylint: disable=protected-access
 
 
 def test_get_request_error(mocker):
@@ -47,17 +64,71 @@ def test_get_non_200_status(mocker):
     assert response is None
 
 
+@pytest.mark.parametrize(
+    "headers, chunks",
+    [
+        # Non-HTML Content-Type
+        ({"Content-Type": "application/pdf"}, [b"%PDF-1.7"]),
+        # Content-Length over the limit
+        ({"Content-Type": "text/html", "Content-Length": "2048"}, [b"<html></html>"]),
+        # Body over the limit without a Content-Length
+        ({"Content-Type": "text/html"}, [b"<html>", b"x" * 2048, b"</html>"]),
+    ],
+)
+def test_get_skips_unwanted_responses(mocker: MockerFixture, headers, chunks):
+    """
+    Test a _get call rejecting a response by its headers or size
+    """
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.headers = headers
+    mock_response.iter_content.return_value = chunks
+
+    mocker.patch("requests.get", return_value=mock_response)
+
+    response = _get("https://example.com", HTML_CONTENT_TYPES, max_size=1024)
+    assert response is None
+    mock_response.close.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://example.com/guide/index.html", True),
+        ("https://example.com/guide/", True),
+        ("https://example.com/_sources/index.rst.txt", False),
+        ("https://example.com/manual.PDF", False),
+        ("https://example.com/_images/logo.png", False),
+    ],
+)
+def test_is_html_link(url, expected):
+    """
+    Test the extension filter on a variety of links
+    """
+    assert _is_html_link(url) == expected
+
+
+@pytest.mark.parametrize("content_type, body, expected_encoding", get_encoding_test_cases)
+def test_get_encoding(content_type, body, expected_encoding):
+    """
+    Test encoding resolution from headers and <meta charset>
+    """
+    assert _get_encoding(content_type, body) == expected_encoding
+
+
 def test_extract_links_by_class_success(mocker):
     """
     Test successful link extraction
     """
     mock_response = mocker.Mock()
-    mock_response.text = """
+    mock_response.headers = {"Content-Type": "text/html"}
+    mock_response.content = b"""
     <html>
         <body>
             <a href="https://example.com/page1" class="link-class">Link 1</a>
             <a href="/page2" class="link-class other-class">Link 2</a>
             <a href="/page3" class="other-class">Link 3</a>
+            <a href="/_sources/page2.rst.txt" class="link-class">Source</a>
         </body>
     </html>
     """
@@ -89,7 +160,8 @@ def test_extract_links_by_class_no_matching_links(mocker):
     Test link extraction when no links match the class filter
     """
     mock_response = mocker.Mock()
-    mock_response.text = """
+    mock_response.headers = {"Content-Type": "text/html"}
+    mock_response.content = b"""
     <html>
         <body>
             <a href="https://example.com/page1" class="other-class">Link 1</a>
@@ -104,3 +176,114 @@ def test_extract_links_by_class_no_matching_links(mocker):
     result = extract_links_by_class(base_url, classes)
 
     assert result == ["https://example.com"]
+
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://docs.example.com/en/latest/</loc></url>
+  <url><loc>https://docs.example.com/en/latest/guide.html</loc><lastmod>2024-01-01</lastmod></url>
+  <url><loc>https://docs.example.com/en/latest/_images/logo.png</loc></url>
+  <url><loc>https://docs.example.com/en/stable/guide.html</loc></url>
+</urlset>
+"""
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://docs.example.com/sitemap-latest.xml.gz</loc></sitemap>
+</sitemapindex>
+"""
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://docs.example.com/en/latest/", "https://docs.example.com/en/latest/"),
+        ("https://docs.example.com/en/latest", "https://docs.example.com/en/latest/"),
+        ("https://docs.example.com/en/latest/index.html#intro", "https://docs.example.com/en/latest/"),
+        ("https://docs.example.com", "https://docs.example.com/"),
+        # Versioned documentation roots are directories, not file names
+        ("https://docs.python.org/3.12", "https://docs.python.org/3.12/"),
+        ("https://numpy.org/doc/1.26", "https://numpy.org/doc/1.26/"),
+        ("https://example.com/docs/page.php?id=1", "https://example.com/docs/"),
+    ],
+)
+def test_site_dir(url, expected):
+    """
+    Test finding the directory of the documentation
+    """
+    assert _site_dir(url) == expected
+
+
+def _serve(mocker: MockerFixture, pages: dict[str, bytes]):
+    """
+    Mock _get to serve the given bodies and return None for any other URL
+    """
+    return mocker.patch(
+        "scrapethedocs._link_extraction._get",
+        side_effect=lambda url, *args, **kwargs: mocker.Mock(content=pages[url], headers={}) if url in pages else None,
+    )
+
+
+def test_extract_links_from_sitemap(mocker: MockerFixture):
+    """
+    Test reading a sitemap next to the documentation
+    """
+    _serve(mocker, {"https://docs.example.com/en/latest/sitemap.xml": SITEMAP})
+
+    result = extract_links_from_sitemap("https://docs.example.com/en/latest/")
+
+    assert result == ["https://docs.example.com/en/latest/", "https://docs.example.com/en/latest/guide.html"]
+
+
+def test_extract_links_from_sitemap_index(mocker: MockerFixture):
+    """
+    Test following a gzip-compressed sitemap from a sitemap index at the domain root
+    """
+    mock_get = _serve(
+        mocker,
+        {
+            "https://docs.example.com/sitemap.xml": SITEMAP_INDEX,
+            "https://docs.example.com/sitemap-latest.xml.gz": gzip.compress(SITEMAP),
+        },
+    )
+
+    result = extract_links_from_sitemap("https://docs.example.com/en/latest/index.html")
+
+    assert result == [
+        "https://docs.example.com/en/latest/index.html",
+        "https://docs.example.com/en/latest/",
+        "https://docs.example.com/en/latest/guide.html",
+    ]
+    assert mock_get.call_count == 4
+
+
+def test_extract_links_from_sitemap_missing(mocker: MockerFixture):
+    """
+    Test a site without a usable sitemap
+    """
+    _serve(mocker, {"https://docs.example.com/sitemap.xml": b"<urlset><url><loc>broken"})
+
+    assert not extract_links_from_sitemap("https://docs.example.com/")
+
+
+def test_extract_mkdocs_search_index(mocker: MockerFixture):
+    """
+    Test folding the headings of the search index back into their pages
+    """
+    index = {
+        "config": {"lang": ["en"]},
+        "docs": [
+            {"location": "", "title": "Home", "text": "<p>Welcome &amp; hello.</p>"},
+            {"location": "guide/", "title": "Guide", "text": ""},
+            {"location": "guide/#install", "title": "Install", "text": "<p>Run <code>pip</code>.</p>"},
+            {"location": "guide/#usage", "title": "Usage", "text": "Import it."},
+        ],
+    }
+    _serve(mocker, {"https://docs.example.com/search/search_index.json": json.dumps(index).encode()})
+
+    result = extract_mkdocs_search_index("https://docs.example.com")
+
+    assert result == [
+        ("Home", "https://docs.example.com/", "Welcome & hello."),
+        ("Guide", "https://docs.example.com/guide/", "Install\nRun pip.\nUsage\nImport it."),
+    ]
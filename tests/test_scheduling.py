@@ -0,0 +1,95 @@
+"""
+Tests for the _scheduling functions
+"""
+
+import time
+
+import pytest
+
+from scrapethedocs._scheduling import fetch_by_priority, rank_links
+
+LINKS = [
+    "https://docs.example.com/",
+    "https://docs.example.com/changelog.html",
+    "https://docs.example.com/user_guide/io/parsers.html",
+    "https://docs.example.com/user_guide/index.html",
+    "https://docs.example.com/capitalization.html",
+    "https://docs.example.com/reference/api/frame.html",
+    "https://docs.example.com/reference/index.html",
+]
+
+
+def test_rank_links():
+    """
+    Test ranking by kind of page, then depth, then original order
+    """
+    assert rank_links(LINKS + LINKS[:2]) == [
+        "https://docs.example.com/reference/index.html",
+        "https://docs.example.com/reference/api/frame.html",
+        "https://docs.example.com/user_guide/index.html",
+        "https://docs.example.com/user_guide/io/parsers.html",
+        "https://docs.example.com/",
+        "https://docs.example.com/capitalization.html",
+        "https://docs.example.com/changelog.html",
+    ]
+
+
+def test_rank_links_source_listings_last():
+    """
+    Test that Sphinx viewcode source listings do not rank as API reference
+    """
+    links = ["https://docs.example.com/_modules/pkg/core.html", "https://docs.example.com/user_guide/intro.html"]
+
+    assert rank_links(links) == [links[1], links[0]]
+
+
+def test_rank_links_by_size():
+    """
+    Test that known sizes break ties at the same depth
+    """
+    links = ["https://docs.example.com/api/a.html", "https://docs.example.com/api/b.html", "https://docs.example.com/api/c.html"]
+    sizes = {links[0]: 5000, links[2]: 100}
+
+    assert rank_links(links, sizes) == [links[2], links[0], links[1]]
+
+
+def _fetch(link: str) -> tuple[str, str] | None:
+    """
+    Fake page fetch: links ending in "missing" fail, links ending in "slow" take a while
+    """
+    if link.endswith("missing"):
+        return None
+    if link.endswith("slow"):
+        time.sleep(0.5)
+    if link.endswith("error"):
+        raise ValueError("boom")
+    return link.upper(), f"text of {link}"
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_fetch_by_priority_page_budget(jobs):
+    """
+    Test that only the highest-priority pages are fetched within a page budget
+    """
+    links = ["a", "b-missing", "c", "d", "e"]
+
+    result = fetch_by_priority(links, _fetch, page_budget=3, jobs=jobs)
+
+    assert result.sections == {"A": "text of a", "C": "text of c"}
+    assert result.failed == ["b-missing"]
+    assert result.skipped == ["d", "e"]
+
+
+def test_fetch_by_priority_time_budget():
+    """
+    Test that the call returns at the deadline with the pages completed so far
+    """
+    links = ["a", "b-slow", "c-slow", "d-error", "e"]
+
+    started = time.monotonic()
+    result = fetch_by_priority(links, _fetch, time_budget=0.2, jobs=3)
+
+    assert time.monotonic() - started < 0.45
+    assert list(result.sections) == ["A", "E"]
+    assert result.failed == ["d-error"]
+    assert result.skipped == ["b-slow", "c-slow"]
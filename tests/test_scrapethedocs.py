@@ -16,11 +16,21 @@ from test_data import (
 
 from scrapethedocs import (
     extract_docs,
+    extract_docs_from_search_index,
+    extract_docs_prioritized,
     extract_page,
+    extract_page_sections,
     get_doc_home_url,
+    get_doc_page_urls,
     get_doc_reference_url,
     get_section_titles,
 )
+from scrapethedocs._link_extraction import (
+    HTML_CONTENT_TYPES,
+    MAX_BODY_SIZE,
+    _get_encoding,
+)
+from scrapethedocs._section_store import SectionStore
 
 
 @pytest.mark.parametrize("package_name, mock_response, expected_url", get_doc_home_url_test_cases)
@@ -81,9 +91,10 @@ def test_extract_page(mocker, link, mock_response, mock_page_text, expected_resu
     result = extract_page(link)
 
     assert result == expected_result
-    mock_get.assert_called_once_with(link)
+    mock_get.assert_called_once_with(link, HTML_CONTENT_TYPES, MAX_BODY_SIZE)
     if mock_response:
-        mock_get_page_text.assert_called_once_with(mock_response.text)
+        encoding = _get_encoding(mock_response.headers.get("Content-Type"), b"")
+        mock_get_page_text.assert_called_once_with(mock_response.content, link, encoding)
     if mock_page_text:
         mock_clean_page_text.assert_called_once_with(mock_page_text)
 
@@ -97,7 +108,9 @@ def test_extract_docs(mocker, package_url, mocked_titles, expected_result):
 
     mock_extract_page = mocker.patch(
         "scrapethedocs._link_extraction.extract_page",
-        side_effect=lambda link: f"Cleaned text for {link.split('/')[-1].capitalize()}" if link != "https://docs.example.com/api" else None,
+        side_effect=lambda link, **_: (
+            f"Cleaned text for {link.split('/')[-1].capitalize()}" if link != "https://docs.example.com/api" else None
+        ),
     )
 
     result = extract_docs(package_url)
@@ -106,3 +119,146 @@ def test_extract_docs(mocker, package_url, mocked_titles, expected_result):
     mock_get_section_titles.assert_called_once_with(package_url)
     for _, link in mocked_titles:
         mock_extract_page.assert_any_call(link)
+
+
+def test_extract_docs_bounded_memory(mocker, capsys):
+    """
+    Test the bounded-memory mode of extract_docs
+    """
+    titles = [("Introduction", "https://docs.example.com/intro"), ("Usage Guide", "https://docs.example.com/usage")]
+    mocker.patch("scrapethedocs.get_section_titles", return_value=titles)
+    mocker.patch("scrapethedocs.extract_page", side_effect=lambda link, **_: f"Cleaned text for {link}")
+
+    with extract_docs("https://docs.example.com", memory_budget=10) as result:
+        assert isinstance(result, SectionStore)
+        assert dict(result) == {title: f"Cleaned text for {link}" for title, link in titles}
+        assert result.spilled_count == 2
+
+    assert "Peak memory" in capsys.readouterr().out
+
+
+def test_extract_docs_prioritized(mocker):
+    """
+    Test that the reference pages are extracted first within a page budget
+    """
+    links = ["https://docs.example.com", "https://docs.example.com/changelog.html", "https://docs.example.com/api/index.html"]
+    mocker.patch("scrapethedocs.extract_links_by_class", return_value=links)
+    mock_extract = mocker.patch(
+        "scrapethedocs._extract_titled_page",
+        side_effect=lambda link: (link.split("/")[-1], f"Text of {link}"),
+    )
+
+    result = extract_docs_prioritized("https://docs.example.com", page_budget=2)
+
+    assert result.sections == {
+        "index.html": "Text of https://docs.example.com/api/index.html",
+        "docs.example.com": "Text of https://docs.example.com",
+    }
+    assert result.skipped == ["https://docs.example.com/changelog.html"]
+    assert mock_extract.call_count == 2
+
+
+def test_extract_docs_prioritized_by_size(mocker):
+    """
+    Test that the given page sizes order the pages of the same priority
+    """
+    links = ["https://docs.example.com/guide/large.html", "https://docs.example.com/guide/small.html"]
+    mocker.patch("scrapethedocs.extract_links_by_class", return_value=links)
+    mocker.patch("scrapethedocs._extract_titled_page", side_effect=lambda link: (link.split("/")[-1], f"Text of {link}"))
+
+    result = extract_docs_prioritized("https://docs.example.com", page_budget=1, jobs=1, sizes={links[0]: 50_000, links[1]: 2_000})
+
+    assert result.sections == {"small.html": "Text of https://docs.example.com/guide/small.html"}
+    assert result.skipped == ["https://docs.example.com/guide/large.html"]
+
+
+def test_extract_docs_strips_boilerplate(mocker):
+    """
+    Test that lines repeated on every page are removed before cleaning
+    """
+    titles = [(f"Section {i}", f"https://docs.example.com/{i}") for i in range(4)]
+    mocker.patch("scrapethedocs.get_section_titles", return_value=titles)
+    mock_extract_page_text = mocker.patch(
+        "scrapethedocs._extract_page_text",
+        side_effect=lambda link: f"Navigation\nText of page {link[-1]}.\nNext\n© Copyright 2024" if link[-1] != "3" else None,
+    )
+
+    result = extract_docs("https://docs.example.com", boilerplate_threshold=0.8)
+
+    assert result == {"Section 0": "Text of page 0.", "Section 1": "Text of page 1.", "Section 2": "Text of page 2.", "Section 3": None}
+    assert mock_extract_page_text.call_count == 4
+
+
+def test_extract_docs_strips_boilerplate_bounded_memory(mocker):
+    """
+    Test that each section is spilled to disk once when boilerplate is removed in the bounded-memory mode
+    """
+    titles = [(f"Section {i}", f"https://docs.example.com/{i}") for i in range(3)]
+    mocker.patch("scrapethedocs.get_section_titles", return_value=titles)
+    mocker.patch("scrapethedocs._extract_page_text", side_effect=lambda link: f"Navigation\nText of page {link[-1]}.")
+
+    with extract_docs("https://docs.example.com", memory_budget=10, boilerplate_threshold=0.8) as result:
+        assert dict(result) == {f"Section {i}": f"Text of page {i}." for i in range(3)}
+        assert result.spilled_count == len(result) == 3
+
+
+def test_extract_page_sections(mocker):
+    """
+    Test that every section of the tree is cleaned
+    """
+    html_input = b"<div class='main-content'><h1 id='api'>API</h1><p>First part</p><p>continued.</p><h2 id='sub'>Sub</h2><p>Text.</p></div>"
+    mocker.patch("scrapethedocs._get", return_value=Mock(content=html_input, headers={}))
+
+    root = extract_page_sections("https://docs.example.com/api.html")
+
+    assert root is not None
+    api = root.find("api")
+    assert api is not None and api.text == "First part continued."
+    assert api.get_text() == "API\nFirst part continued.\nSub\nText."
+
+
+@pytest.mark.parametrize(
+    "search_pages, sitemap_links, expected_links",
+    [
+        # Case: MkDocs search index found
+        (
+            [("Home", "https://docs.example.com/", ""), ("Guide", "https://docs.example.com/guide/", "")],
+            [],
+            ["https://docs.example.com/", "https://docs.example.com/guide/"],
+        ),
+        # Case: sitemap found
+        (
+            [],
+            ["https://docs.example.com", "https://docs.example.com/api.html"],
+            ["https://docs.example.com", "https://docs.example.com/api.html"],
+        ),
+        # Case: neither found, fall back to the guides linked from the home page
+        ([], [], ["https://docs.example.com", "https://docs.example.com/ref1"]),
+    ],
+)
+def test_get_doc_page_urls(mocker, search_pages, sitemap_links, expected_links):
+    """
+    Test the order of the discovery backends
+    """
+    mocker.patch("scrapethedocs.extract_mkdocs_search_index", return_value=search_pages)
+    mocker.patch("scrapethedocs.extract_links_from_sitemap", return_value=sitemap_links)
+    mocker.patch("scrapethedocs.extract_links_by_class", return_value=["https://docs.example.com", "https://docs.example.com/ref1"])
+
+    assert get_doc_page_urls("https://docs.example.com") == expected_links
+
+
+def test_extract_docs_from_search_index(mocker):
+    """
+    Test extracting an MkDocs site without fetching any page
+    """
+    mocker.patch(
+        "scrapethedocs.extract_mkdocs_search_index",
+        return_value=[("Home", "https://docs.example.com/", "Welcome\nto the docs."), ("Home", "https://docs.example.com/other/", "Other")],
+    )
+    mock_get = mocker.patch("scrapethedocs._get")
+
+    assert extract_docs_from_search_index("https://docs.example.com") == {"Home": "Welcome to the docs."}
+    mock_get.assert_not_called()
+
+    mocker.patch("scrapethedocs.extract_mkdocs_search_index", return_value=[])
+    assert extract_docs_from_search_index("https://docs.example.com") is None
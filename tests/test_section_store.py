@@ -0,0 +1,66 @@
+"""
+Tests for the SectionStore
+"""
+
+from pytest_mock import MockerFixture
+
+from scrapethedocs._section_store import SectionStore, current_rss, peak_rss
+
+
+def test_section_store_in_memory():
+    """
+    Test that nothing is spilled under the budget
+    """
+    with SectionStore(memory_budget=100) as store:
+        store["Intro"] = "Hello"
+        store["API"] = None
+
+        assert dict(store) == {"Intro": "Hello", "API": None}
+        assert store.spilled_count == 0
+        assert store.memory_bytes == 5
+
+
+def test_section_store_spills_over_memory_budget():
+    """
+    Test that crossing the budget moves all text to disk and keeps the order
+    """
+    with SectionStore(memory_budget=10) as store:
+        store["Intro"] = "Hello"
+        store["Usage"] = "Wörld!"
+        store["API"] = "x" * 100
+        store["Broken"] = None
+
+        assert store.spilled_count == 3
+        assert store.memory_bytes == 0
+        assert list(store) == ["Intro", "Usage", "API", "Broken"]
+        assert dict(store) == {"Intro": "Hello", "Usage": "Wörld!", "API": "x" * 100, "Broken": None}
+
+        store["Intro"] = "Replaced"
+        del store["Usage"]
+        assert dict(store) == {"API": "x" * 100, "Broken": None, "Intro": "Replaced"}
+        assert store.spilled_count == 2
+
+    assert len(store) == 0
+
+
+def test_section_store_spills_over_rss_budget(mocker: MockerFixture):
+    """
+    Test spilling once the process RSS crosses the budget
+    """
+    mocker.patch("scrapethedocs._section_store.current_rss", side_effect=[100, 300])
+
+    with SectionStore(rss_budget=200) as store:
+        store["Intro"] = "Hello"
+        assert store.spilled_count == 0
+        store["API"] = "World"
+        assert store.spilled_count == 2
+        assert dict(store) == {"Intro": "Hello", "API": "World"}
+
+
+def test_rss_measurements():
+    """
+    Test that the RSS readings are plausible where they are available
+    """
+    rss, peak = current_rss(), peak_rss()
+    assert rss is None or rss > 0
+    assert peak is None or peak > 0
@@ -2,6 +2,7 @@
 Tests for the _text_extraction functions
 """
 
+import asyncio
 from unittest.mock import AsyncMock
 
 import pytest
@@ -13,21 +14,40 @@ from scrapethedocs._text_extraction import (
     _fetch_title_async,
     clean_page_text,
     get_all_titles,
+    get_page_sections,
     get_page_text,
 )
 
 
-@pytest.mark.asyncio
-async def test_fetch_title_async_success(mocker: MockerFixture):
+async def _chunks(*chunks: bytes):
     """
-    Test title fetching when everything works as intended
+    Yield the given chunks like aiohttp's StreamReader.iter_chunked
+    """
+    for chunk in chunks:
+        yield chunk
+
+
+def _mock_html_response(mocker: MockerFixture, *chunks: bytes, content_type: str = "text/html", content_length: int | None = None):
+    """
+    Build a mocked aiohttp response streaming the given chunks
     """
     mock_response = AsyncMock()
     mock_response.status = 200
-    mock_response.text = mocker.AsyncMock(return_value="<html><head><title>Test Page</title></head></html>")
-
+    mock_response.headers = {"Content-Type": content_type}
+    mock_response.content_length = content_length
+    mock_response.charset = None
+    mock_response.content.iter_chunked = mocker.Mock(return_value=_chunks(*chunks))
     mock_response.__aenter__.return_value = mock_response
     mock_response.__aexit__.return_value = None
+    return mock_response
+
+
+@pytest.mark.asyncio
+async def test_fetch_title_async_success(mocker: MockerFixture):
+    """
+    Test title fetching when everything works as intended
+    """
+    mock_response = _mock_html_response(mocker, b"<html><head><title>Test Page</title></head></html>")
 
     mocker.patch("aiohttp.ClientSession.get", return_value=mock_response)
 
@@ -44,11 +64,7 @@ async def test_fetch_title_async_no_title(mocker: MockerFixture):
     """
     Test title fetching when the page has no title
     """
-    mock_response = AsyncMock()
-    mock_response.status = 200
-    mock_response.text = mocker.AsyncMock(return_value="<html><head></head></html>")
-    mock_response.__aenter__.return_value = mock_response
-    mock_response.__aexit__.return_value = None
+    mock_response = _mock_html_response(mocker, b"<html><head></head></html>")
     mocker.patch("aiohttp.ClientSession.get", return_value=mock_response)
 
     link = "https://example.com"
@@ -80,6 +96,50 @@ async def test_fetch_title_async_non_200_status(mocker: MockerFixture):
     assert len(results) == 0
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "content_type, content_length, chunks",
+    [
+        # Non-HTML Content-Type
+        ("application/pdf", None, [b"%PDF-1.7"]),
+        # Content-Length over the limit
+        ("text/html", 2048, [b"<html></html>"]),
+        # Body over the limit without a Content-Length
+        ("text/html", None, [b"<html>", b"x" * 2048, b"</html>"]),
+    ],
+)
+async def test_fetch_title_async_skips_unwanted_responses(mocker: MockerFixture, content_type, content_length, chunks):
+    """
+    Test that unwanted responses are skipped before parsing
+    """
+    mock_response = _mock_html_response(mocker, *chunks, content_type=content_type, content_length=content_length)
+    mocker.patch("aiohttp.ClientSession.get", return_value=mock_response)
+    mock_soup = mocker.patch("bs4.BeautifulSoup")
+
+    results = []
+    async with ClientSession() as session:
+        await _fetch_title_async(session, "https://example.com", results, max_size=1024)
+
+    assert len(results) == 0
+    mock_soup.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_fetch_title_async_skips_non_html_links(mocker: MockerFixture):
+    """
+    Test that links to non-HTML resources are not requested
+    """
+    mock_get = mocker.patch("aiohttp.ClientSession.get")
+
+    results = []
+    async with ClientSession() as session:
+        await _fetch_title_async(session, "https://example.com/_sources/index.rst.txt", results)
+        await _fetch_title_async(session, "https://example.com/manual.pdf", results)
+
+    assert len(results) == 0
+    mock_get.assert_not_called()
+
+
 def test_get_all_titles_with_valid_links(mocker: MockerFixture):
     """
     Test title fetching when all links are valid
@@ -89,7 +149,9 @@ def test_get_all_titles_with_valid_links(mocker: MockerFixture):
 
     mocker.patch(
         "scrapethedocs._text_extraction._fetch_title_async",
-        side_effect=lambda session, link, results: results.append(next((title for title in mock_results if title[1] == link), None)),
+        side_effect=lambda session, link, results, max_size: results.append(
+            next((title for title in mock_results if title[1] == link), None)
+        ),
     )
 
     result = get_all_titles(links)
@@ -108,7 +170,9 @@ def test_get_all_titles_with_duplicate_titles(mocker: MockerFixture):
 
     mocker.patch(
         "scrapethedocs._text_extraction._fetch_title_async",
-        side_effect=lambda session, link, results: results.append(next((title for title in mock_results if title[1] == link), None)),
+        side_effect=lambda session, link, results, max_size: results.append(
+            next((title for title in mock_results if title[1] == link), None)
+        ),
     )
 
     result = get_all_titles(links)
@@ -127,7 +191,9 @@ def test_get_all_titles_with_invalid_links(mocker: MockerFixture):
 
     mocker.patch(
         "scrapethedocs._text_extraction._fetch_title_async",
-        side_effect=lambda session, link, results: results.append(next((title for title in mock_results if title[1] == link), None)),
+        side_effect=lambda session, link, results, max_size: results.append(
+            next((title for title in mock_results if title[1] == link), None)
+        ),
     )
 
     result = get_all_titles(links)
@@ -136,6 +202,47 @@ def test_get_all_titles_with_invalid_links(mocker: MockerFixture):
     assert result == expected_result
 
 
+def test_get_all_titles_shares_session(mocker: MockerFixture):
+    """
+    Test that consecutive calls reuse one session
+    """
+    sessions = []
+    mocker.patch(
+        "scrapethedocs._text_extraction._fetch_title_async",
+        side_effect=lambda session, link, results, max_size: sessions.append(session),
+    )
+
+    get_all_titles(["http://example.com"])
+    get_all_titles(["http://another.com"])
+
+    assert len(sessions) == 2
+    assert sessions[0] is sessions[1]
+    assert not sessions[0].closed
+
+
+def test_get_all_titles_caps_pages_in_flight(mocker: MockerFixture):
+    """
+    Test that no more than max_in_flight pages are fetched at once
+    """
+    in_flight = 0
+    peak = 0
+
+    async def fetch_title(_session, link, results, _max_size):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        results.append((link, link))
+
+    mocker.patch("scrapethedocs._text_extraction._fetch_title_async", side_effect=fetch_title)
+
+    result = get_all_titles([f"http://example.com/{i}" for i in range(10)], max_in_flight=3)
+
+    assert len(result) == 10
+    assert peak == 3
+
+
 def test_get_all_titles_with_empty_links():
     """
     Test empty input
@@ -156,6 +263,79 @@ def test_get_page_text(html_input, expected_output):
     assert result == expected_output
 
 
+@pytest.mark.parametrize(
+    "html_input, encoding",
+    [
+        ("<div class='main-content'><p>Caf\u00e9 na\u00efve</p></div>".encode("utf-8"), None),
+        ("<meta charset='windows-1252'><div class='main-content'><p>Caf\u00e9 na\u00efve</p></div>".encode("cp1252"), None),
+        ("<div class='main-content'><p>Caf\u00e9 na\u00efve</p></div>".encode("latin-1"), "iso8859-1"),
+    ],
+)
+def test_get_page_text_bytes(html_input, encoding):
+    """
+    Test parsing raw bytes with a declared or sniffed encoding
+    """
+    assert get_page_text(html_input, encoding=encoding) == "Caf\u00e9 na\u00efve"
+
+
+SECTIONED_PAGE = """
+<html><head><title>Guide</title></head><body>
+<div class='main-content'>
+  <p>Preface</p>
+  <div class='section' id='install'>
+    <h1>Install<a class='headerlink' href='#install'>\u00b6</a></h1>
+    <p>Run pip.</p>
+    <div class='section' id='from-source'>
+      <h2>From source</h2>
+      <p>Clone it.</p>
+      <pre>make install</pre>
+    </div>
+  </div>
+  <h1 id='usage'>Usage</h1>
+  <p>Import it.</p>
+  <h3>Deep heading</h3>
+  <p>Details.</p>
+  <h2>Advanced</h2>
+  <p>More.</p>
+</div>
+</body></html>
+"""
+
+
+def test_get_page_sections():
+    """
+    Test the heading tree built alongside the page text
+    """
+    root = get_page_sections(SECTIONED_PAGE)
+
+    assert (root.level, root.title, root.text) == (0, "Guide", "Preface")
+    assert [(section.level, section.title, section.anchor) for section in root.walk()][1:] == [
+        (1, "Install", "install"),
+        (2, "From source", "from-source"),
+        (1, "Usage", "usage"),
+        (3, "Deep heading", None),
+        (2, "Advanced", None),
+    ]
+    usage = root.find("#usage")
+    assert usage is not None
+    assert usage.text == "Import it."
+    assert [child.title for child in usage.children] == ["Deep heading", "Advanced"]
+
+    install = root.find("install")
+    assert install is not None
+    assert install.get_text() == "Install\nRun pip.\nFrom source\nClone it.\nmake install"
+    assert root.find("missing") is None
+
+
+def test_get_page_sections_matches_page_text():
+    """
+    Test that the tree holds the same text as get_page_text
+    """
+    root = get_page_sections(SECTIONED_PAGE)
+
+    assert root.get_text() == "Guide\n" + get_page_text(SECTIONED_PAGE)
+
+
 @pytest.mark.parametrize("clean_input, clean_output", clean_text_test_cases)
 def test_clean_page_text(clean_input, clean_output):
     """
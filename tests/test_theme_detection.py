@@ -0,0 +1,95 @@
+"""
+Tests for the _theme_detection functions
+"""
+
+import pytest
+from bs4 import BeautifulSoup
+from pytest_mock import MockerFixture
+from test_data import detect_theme_test_cases, theme_page_test_cases
+
+from scrapethedocs._text_extraction import get_page_text
+from scrapethedocs._theme_detection import (
+    _theme_cache,
+    clear_theme_cache,
+    detect_theme,
+    find_content_root,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_theme_cache():
+    """
+    Start every test with no cached themes
+    """
+    clear_theme_cache()
+    yield
+    clear_theme_cache()
+
+
+@pytest.mark.parametrize("html_input, expected_theme", detect_theme_test_cases)
+def test_detect_theme(html_input, expected_theme):
+    """
+    Test theme detection on a variety of layouts
+    """
+    assert detect_theme(BeautifulSoup(html_input, "html.parser")) == expected_theme
+
+
+def test_find_content_root_caches_theme_per_host():
+    """
+    Test that the theme detected on the first page is reused for the host
+    """
+    first_page = BeautifulSoup("<div class='rst-content'><p>First</p></div>", "html.parser")
+    root = find_content_root(first_page, "https://docs.example.com/index.html")
+
+    assert root is not None and root.get_text() == "First"
+    assert _theme_cache == {"docs.example.com": "sphinx-rtd-theme"}
+
+    # A page that would be detected differently still uses the cached selector
+    second_page = BeautifulSoup("<main class='pdoc'>Other</main><div class='rst-content'><p>Second</p></div>", "html.parser")
+    root = find_content_root(second_page, "https://docs.example.com/api.html")
+
+    assert root is not None and root.get_text() == "Second"
+
+
+def test_find_content_root_unknown_theme(mocker: MockerFixture):
+    """
+    Test that unknown layouts are cached so later pages skip the detection
+    """
+    mock_detect_theme = mocker.patch("scrapethedocs._theme_detection.detect_theme", return_value=None)
+    soup = BeautifulSoup("<div class='content'><p>Text</p></div>", "html.parser")
+
+    assert find_content_root(soup, "https://docs.example.com") is None
+    assert find_content_root(soup, "https://docs.example.com/api.html") is None
+    assert _theme_cache == {"docs.example.com": None}
+    mock_detect_theme.assert_called_once()
+
+
+def test_find_content_root_caches_theme_per_project():
+    """
+    Test that the projects hosted side by side on one host keep their own theme
+    """
+    furo_page = BeautifulSoup("<article role='main'><p>Furo</p></article>", "html.parser")
+    pdoc_page = BeautifulSoup("<main class='pdoc'><p>pdoc</p></main>", "html.parser")
+
+    find_content_root(furo_page, "https://user.github.io/proj-a/index.html")
+    root = find_content_root(pdoc_page, "https://user.github.io/proj-b/api.html")
+
+    assert root is not None and root.get_text() == "pdoc"
+    assert _theme_cache == {"user.github.io/proj-a": "furo", "user.github.io/proj-b": "pdoc"}
+
+
+def test_get_page_text_uses_theme_selector():
+    """
+    Test that a theme missing from CONTENT_CLASSES is extracted
+    """
+    html_input = "<nav><p>Navigation</p></nav><article class='md-content__inner'><h1>Title</h1><p>Body</p></article>"
+
+    assert get_page_text(html_input, "https://docs.example.com") == "Title\nBody"
+
+
+@pytest.mark.parametrize("html_input, expected_text", theme_page_test_cases)
+def test_get_page_text_nested_theme_markup(html_input, expected_text):
+    """
+    Test that the text nested in the sections of themed pages is extracted
+    """
+    assert get_page_text(html_input, "https://docs.example.com") == expected_text
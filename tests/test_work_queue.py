@@ -0,0 +1,137 @@
+"""
+Tests for the work queue and the workers
+"""
+
+import json
+import threading
+
+import pytest
+from pytest_mock import MockerFixture
+
+from scrapethedocs import run_worker
+from scrapethedocs._cli import worker_main
+from scrapethedocs._work_queue import PACKAGE_JOB, PAGE_JOB, SQLiteWorkQueue
+
+
+@pytest.fixture(name="queue_path")
+def fixture_queue_path(tmp_path):
+    """
+    A path for a fresh queue file
+    """
+    return str(tmp_path / "queue.db")
+
+
+def test_put_deduplicates(queue_path):
+    """
+    Test that the same job is only added once
+    """
+    queue = SQLiteWorkQueue(queue_path)
+
+    assert queue.put(PACKAGE_JOB, {"package": "alpha"})
+    assert not queue.put(PACKAGE_JOB, {"package": "alpha"})
+    assert queue.counts() == {"pending": 1, "leased": 0, "done": 0, "failed": 0}
+
+
+def test_lease_ack(queue_path):
+    """
+    Test that a leased job is hidden from other workers and stays done once acknowledged
+    """
+    queue = SQLiteWorkQueue(queue_path)
+    other = SQLiteWorkQueue(queue_path)
+    queue.put(PAGE_JOB, {"link": "a"})
+
+    job = queue.lease("worker-1")
+    assert job is not None and job.payload == {"link": "a"} and job.attempts == 1
+    assert other.lease("worker-2") is None
+    assert not other.ack(job, "worker-2", "stolen")
+    assert queue.ack(job, "worker-1", {"text": "A"})
+
+    assert queue.is_drained()
+    assert list(other.results(PAGE_JOB)) == [({"link": "a"}, {"text": "A"})]
+
+
+def test_expired_lease_is_retried(queue_path):
+    """
+    Test that the job of a dead worker is leased again after its lease expires
+    """
+    queue = SQLiteWorkQueue(queue_path, max_attempts=2)
+    queue.put(PAGE_JOB, {"link": "a"})
+
+    first = queue.lease("dead-worker", lease_seconds=-1)
+    second = queue.lease("worker-2", lease_seconds=-1)
+    assert first is not None and second is not None
+    assert second.id == first.id and second.attempts == 2
+    assert not queue.ack(first, "dead-worker")
+
+    assert queue.counts()["failed"] == 1
+    assert queue.lease("worker-3") is None
+    assert queue.is_drained()
+
+
+def test_nack_retries_until_max_attempts(queue_path):
+    """
+    Test that a failed job is retried, then marked failed
+    """
+    queue = SQLiteWorkQueue(queue_path, max_attempts=2)
+    queue.put(PAGE_JOB, {"link": "a"})
+
+    for _ in range(2):
+        job = queue.lease("worker")
+        assert job is not None
+        queue.nack(job, "worker", "boom")
+
+    assert queue.lease("worker") is None
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 0, "failed": 1}
+
+
+@pytest.fixture(name="pipeline")
+def fixture_pipeline(mocker: MockerFixture):
+    """
+    Mock the scraping pipeline with ten pages per package
+    """
+    mocker.patch(
+        "scrapethedocs.get_doc_home_url", side_effect=lambda package: None if package == "broken" else f"https://{package}.example.com"
+    )
+    mocker.patch("scrapethedocs.get_doc_reference_url", side_effect=lambda url: [f"{url}/{i}" for i in range(10)])
+    return mocker.patch("scrapethedocs._extract_titled_page", side_effect=lambda link: (f"Title {link[-1]}", f"Text of {link}"))
+
+
+def test_workers_split_jobs(queue_path, pipeline):
+    """
+    Test that concurrent workers process every job exactly once
+    """
+    queue = SQLiteWorkQueue(queue_path, max_attempts=1)
+    for package in ["alpha", "beta", "broken"]:
+        queue.put(PACKAGE_JOB, {"package": package})
+
+    finished = []
+
+    def work(worker: str) -> None:
+        thread_queue = SQLiteWorkQueue(queue_path, max_attempts=1)
+        finished.append(run_worker(thread_queue, worker, poll_interval=0.01))
+
+    threads = [threading.Thread(target=work, args=(f"worker-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(finished) == 22
+    assert pipeline.call_count == 20
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 22, "failed": 1}
+
+
+def test_worker_main_export(tmp_path, queue_path, pipeline):
+    """
+    Test enqueueing, working and exporting from the command line
+    """
+    export = tmp_path / "docs.jsonl"
+
+    assert worker_main([queue_path, "alpha", "--enqueue-only"]) == 0
+    assert pipeline.call_count == 0
+    assert worker_main([queue_path, "-j", "2", "--export", str(export)]) == 0
+
+    records = [json.loads(line) for line in export.read_text().splitlines()]
+    assert [record["package"] for record in records] == ["alpha"]
+    assert records[0]["sections"]["Title 3"] == "Text of https://alpha.example.com/3"
+    assert len(records[0]["sections"]) == 10